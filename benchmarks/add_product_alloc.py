@@ -0,0 +1,218 @@
+"""
+Выделения памяти на один запрос add_product, до и после быстрого пути.
+
+Режимы:
+
+* response — только построение ответа из строки RETURNING, без БД:
+  прежний путь (OrderOut.model_validate + валидация и сериализация
+  response_model в FastAPI) против OrderItemRow + orjson.dumps.
+  Строка Row берётся из SQLite в памяти.
+* app — полный запрос POST /orders/add_product через ASGI-приложение
+  в этом процессе (нужна БД из DATABASE_URL, заказ и товар с остатком),
+  с выключенным и включённым ADD_PRODUCT_FAST_PATH.
+
+Для каждого варианта на запрос выводятся:
+
+* blocks_per_request — прирост sys.getallocatedblocks() при выключенном
+  сборщике мусора: блоки, не освобождённые подсчётом ссылок
+  (циклические структуры ORM-объектов, сессий, результатов);
+* gc_objects_per_request — объекты, найденные затем gc.collect();
+* peak_bytes_per_request — пиковая память tracemalloc (временные объекты);
+* us_per_request — время.
+
+Выводы об улучшении делаются по режиму app: режим response измеряет только
+сериализацию ответа.
+
+Пример:
+    python -m benchmarks.add_product_alloc --mode response
+    python -m benchmarks.add_product_alloc --mode app --order-id 1 --nomenclature-id 1
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import orjson
+
+os.environ.setdefault("APP_PORT", "8001")
+
+from fastapi.datastructures import DefaultPlaceholder  # noqa: E402
+from fastapi.responses import Response  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from sqlalchemy import create_engine, literal, select  # noqa: E402
+
+from src.core.config import settings  # noqa: E402
+from src.schemas.order import OrderItemRow, OrderOut  # noqa: E402
+
+
+async def measure(name: str, make_request, requests: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await make_request()
+
+    gc.collect()
+    gc.disable()
+    try:
+        blocks_before = sys.getallocatedblocks()
+        started = time.perf_counter()
+        for _ in range(requests):
+            await make_request()
+        elapsed = time.perf_counter() - started
+        blocks = sys.getallocatedblocks() - blocks_before
+    finally:
+        gc_objects = gc.collect()
+        gc.enable()
+
+    tracemalloc.start()
+    peaks = 0
+    for _ in range(requests):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        await make_request()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks += peak - base
+    tracemalloc.stop()
+    return {
+        "name": name,
+        "requests": requests,
+        "blocks_per_request": round(blocks / requests, 1),
+        "gc_objects_per_request": round(gc_objects / requests, 1),
+        "peak_bytes_per_request": round(peaks / requests),
+        "us_per_request": round(elapsed / requests * 1e6, 1),
+    }
+
+
+def returning_row():
+    """Строка с полями RETURNING upsert позиции заказа."""
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        return conn.execute(
+            select(
+                literal(1).label("order_id"),
+                literal(2).label("nomenclature_id"),
+                literal(3).label("amount"),
+                literal("2026-10-18T00:00:00+00:00").label("created_at"),
+            )
+        ).one()
+
+
+def add_product_route():
+    from src.api.product import router
+
+    for route in router.routes:
+        if route.path == "/orders/add_product":
+            return route
+    raise LookupError("/orders/add_product")
+
+
+async def run_response(args) -> list[dict]:
+    row = returning_row()
+    route = add_product_route()
+    dump_json = isinstance(route.response_class, DefaultPlaceholder)
+    response_class = (
+        route.response_class.value if dump_json else route.response_class
+    )
+
+    async def before():
+        content = await serialize_response(
+            field=route.response_field,
+            response_content=OrderOut.model_validate(row),
+            dump_json=dump_json,
+        )
+        if dump_json:
+            return Response(content=content, media_type="application/json")
+        return response_class(content)
+
+    async def after():
+        return Response(
+            orjson.dumps(OrderItemRow.from_row(row)), media_type="application/json"
+        )
+
+    return [
+        await measure("orm_pydantic", before, args.requests, args.warmup),
+        await measure("core_dataclass", after, args.requests, args.warmup),
+    ]
+
+
+async def run_app(args) -> list[dict]:
+    from main import app
+
+    body = orjson.dumps(
+        {
+            "order_id": args.order_id,
+            "nomenclature_id": args.nomenclature_id,
+            "amount": 1,
+        }
+    )
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/orders/add_product",
+        "raw_path": b"/orders/add_product",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", settings.app_port),
+    }
+
+    async def request():
+        sent = False
+        status = None
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(dict(scope), receive, send)
+        if status != 200:
+            raise RuntimeError(f"add_product: HTTP {status}")
+
+    results = []
+    for name, fast_path in (("orm_pydantic", False), ("core_dataclass", True)):
+        settings.add_product_fast_path = fast_path
+        results.append(await measure(name, request, args.requests, args.warmup))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--mode", choices=("response", "app"), default="response")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--order-id", type=int, default=1)
+    parser.add_argument("--nomenclature-id", type=int, default=1)
+    args = parser.parse_args()
+    runner = run_response if args.mode == "response" else run_app
+    results = asyncio.run(runner(args))
+    for result in results:
+        print(orjson.dumps(result).decode())
+    before, after = results
+    for key in (
+        "blocks_per_request",
+        "gc_objects_per_request",
+        "peak_bytes_per_request",
+    ):
+        print(f"{key}: {before[key]} -> {after[key]}")
+
+
+if __name__ == "__main__":
+    main()
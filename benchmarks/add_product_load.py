@@ -0,0 +1,496 @@
+"""
+Нагрузочный тест POST /orders/add_product.
+
+Запросы отправляет собственный HTTP/1.1-клиент на asyncio (одно
+keep-alive соединение на воркер), без сторонних зависимостей. Приложение
+запускается из этого репозитория (--start-app) или уже работает по --url;
+товары и заказы берутся из БД по DATABASE_URL (первые --products и
+--orders по id), при --seed недостающие создаются.
+
+Отчёт: пропускная способность, задержка p50/p95/p99, ошибки по типу
+исключения (сообщение ответа 400 сопоставляется с исключением из
+src.tools.exceptions) и число обращений к БД на запрос — прирост
+statements + commits + rollbacks из /metrics/statements за время нагрузки
+за вычетом фоновых запросов приложения, делённый на число запросов.
+Фоновые запросы оцениваются по приросту счётчиков без нагрузки за
+--idle-baseline секунд; при --start-app фоновые циклы приложения
+(партиции, отчёт топ-5, дерево категорий) после запуска не повторяются.
+Настройки приложения читаются из /metrics/settings. Результат сохраняется
+в JSON вместе с коммитом git для сравнения между коммитами.
+
+Пример:
+    python -m benchmarks.add_product_load --start-app --seed \\
+        --concurrency 64 --requests 20000 --product-dist zipf --order-dist uniform
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import orjson
+
+ROOT = Path(__file__).resolve().parent.parent
+
+os.environ.setdefault("APP_PORT", "8001")
+
+
+class HTTPError(Exception):
+    """Ответ приложения с кодом, отличным от 200."""
+
+    def __init__(self, status: int, detail: str) -> None:
+        self.status = status
+        self.detail = detail
+        super().__init__(f"HTTP {status}: {detail}")
+
+
+class HTTPConnection:
+    """Одно keep-alive соединение HTTP/1.1 поверх asyncio streams."""
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def connect(self) -> None:
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+
+    async def close(self) -> None:
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> bytes:
+        """Тело ответа 200; иначе HTTPError. При обрыве соединение пересоздаётся."""
+        if self.writer is None:
+            await self.connect()
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        )
+        try:
+            self.writer.write(head.encode() + body)
+            status, payload = await asyncio.wait_for(self._response(), self.timeout)
+        except BaseException:
+            await self.close()
+            raise
+        if status != 200:
+            raise HTTPError(status, _detail(payload))
+        return payload
+
+    async def _response(self) -> tuple[int, bytes]:
+        status_line = await self.reader.readuntil(b"\r\n")
+        if not status_line:
+            raise ConnectionResetError("соединение закрыто сервером")
+        status = int(status_line.split(b" ", 2)[1])
+        length = None
+        chunked = False
+        keep_alive = True
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = value == b"chunked"
+            elif name == b"connection":
+                keep_alive = value != b"close"
+        if chunked:
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")
+                    break
+                body += await self.reader.readexactly(size + 2)
+                del body[-2:]
+            payload = bytes(body)
+        elif length is not None:
+            payload = await self.reader.readexactly(length)
+        else:
+            payload = await self.reader.read()
+            keep_alive = False
+        if not keep_alive:
+            await self.close()
+        return status, payload
+
+
+def _detail(payload: bytes) -> str:
+    try:
+        detail = orjson.loads(payload).get("detail")
+    except (orjson.JSONDecodeError, AttributeError):
+        return payload[:200].decode(errors="replace")
+    return detail if isinstance(detail, str) else orjson.dumps(detail).decode()
+
+
+def exception_names() -> dict[str, str]:
+    """Сообщение по умолчанию -> имя исключения приложения."""
+    from src.tools import exceptions
+
+    names = {}
+    for name in dir(exceptions):
+        cls = getattr(exceptions, name)
+        if (
+            isinstance(cls, type)
+            and issubclass(cls, exceptions.CustomExceptionError)
+            and cls is not exceptions.CustomExceptionError
+        ):
+            try:
+                names[str(cls())] = name
+            except TypeError:
+                continue
+    return names
+
+
+class Sampler:
+    """Выбор id: равномерно или по закону Ципфа с показателем s."""
+
+    def __init__(self, ids: list[int], dist: str, s: float, rng: random.Random):
+        self.ids = list(ids)
+        self.rng = rng
+        self.cum_weights = None
+        if dist == "zipf":
+            # Популярность не совпадает с порядком id.
+            rng.shuffle(self.ids)
+            self.cum_weights = list(
+                itertools.accumulate(1 / rank**s for rank in range(1, len(ids) + 1))
+            )
+
+    def __call__(self) -> int:
+        if self.cum_weights is None:
+            return self.ids[self.rng.randrange(len(self.ids))]
+        point = self.rng.random() * self.cum_weights[-1]
+        return self.ids[bisect.bisect_left(self.cum_weights, point)]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу, values отсортированы."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(q / 100 * len(values) + 0.5) - 1))
+    return values[rank]
+
+
+async def load_ids(products: int, orders: int, seed: bool) -> tuple[list, list]:
+    """Первые products товаров и orders заказов; при seed недостающие создаются."""
+    from sqlalchemy import func, insert, select
+
+    from src.db.db import engine
+    from src.db.partition import create_month_partition
+    from src.models.models import Customer, Nomenclature, Order, OrderItem
+
+    async with engine.begin() as conn:
+        product_ids = list(
+            await conn.scalars(
+                select(Nomenclature.id).order_by(Nomenclature.id).limit(products)
+            )
+        )
+        order_ids = list(
+            await conn.scalars(select(Order.id).order_by(Order.id).limit(orders))
+        )
+        if seed and len(product_ids) < products:
+            product_ids += list(
+                await conn.scalars(
+                    insert(Nomenclature)
+                    .values(
+                        [
+                            {"name": f"load-{i}", "amount": 10**9, "price": 100}
+                            for i in range(products - len(product_ids))
+                        ]
+                    )
+                    .returning(Nomenclature.id)
+                )
+            )
+        if seed and len(order_ids) < orders:
+            today = date.today()
+            for table in (Order.__tablename__, OrderItem.__tablename__):
+                await create_month_partition(conn, table, today)
+            customer_id = await conn.scalar(
+                insert(Customer)
+                .values(name="load-test", address="load-test")
+                .returning(Customer.id)
+            )
+            order_ids += list(
+                await conn.scalars(
+                    insert(Order)
+                    .values(
+                        [
+                            {"customer_id": customer_id, "created_at": func.now()}
+                            for _ in range(orders - len(order_ids))
+                        ]
+                    )
+                    .returning(Order.id)
+                )
+            )
+    await engine.dispose()
+    return product_ids, order_ids
+
+
+async def wait_ready(host: str, port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        conn = HTTPConnection(host, port, timeout=2)
+        try:
+            await conn.request("GET", "/docs.json")
+            return
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+        finally:
+            await conn.close()
+
+
+ROUND_TRIP_COUNTERS = ("statements", "commits", "rollbacks")
+
+
+async def get_json(host: str, port: int, path: str) -> dict:
+    conn = HTTPConnection(host, port, timeout=10)
+    try:
+        return orjson.loads(await conn.request("GET", path))
+    finally:
+        await conn.close()
+
+
+async def statement_counters(host: str, port: int) -> dict:
+    return await get_json(host, port, "/metrics/statements")
+
+
+def round_trips(before: dict, after: dict) -> int:
+    return sum(after[key] - before[key] for key in ROUND_TRIP_COUNTERS)
+
+
+async def idle_round_trip_rate(host: str, port: int, seconds: float) -> float:
+    """Обращения к БД в секунду без нагрузки (фоновые задачи приложения)."""
+    if seconds <= 0:
+        return 0.0
+    before = await statement_counters(host, port)
+    started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    after = await statement_counters(host, port)
+    return round_trips(before, after) / (time.perf_counter() - started)
+
+
+async def run_load(
+    args, host: str, port: int, product_ids, order_ids, idle_rate: float = 0.0
+) -> dict:
+    rng = random.Random(args.seed_value)
+    products = Sampler(product_ids, args.product_dist, args.zipf_s, rng)
+    orders = Sampler(order_ids, args.order_dist, args.zipf_s, rng)
+    names = exception_names()
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    remaining = args.requests
+    deadline = time.monotonic() + args.duration if args.duration else None
+
+    def take() -> bool:
+        nonlocal remaining
+        if deadline is not None:
+            return time.monotonic() < deadline
+        remaining -= 1
+        return remaining >= 0
+
+    async def worker() -> None:
+        conn = HTTPConnection(host, port, timeout=args.timeout)
+        try:
+            while take():
+                body = orjson.dumps(
+                    {
+                        "order_id": orders(),
+                        "nomenclature_id": products(),
+                        "amount": args.amount,
+                    }
+                )
+                started = time.perf_counter()
+                try:
+                    await conn.request("POST", "/orders/add_product", body)
+                except HTTPError as err:
+                    key = names.get(err.detail, f"HTTP {err.status}")
+                    errors[key] = errors.get(key, 0) + 1
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as err:
+                    key = type(err).__name__
+                    errors[key] = errors.get(key, 0) + 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            await conn.close()
+
+    before = await statement_counters(host, port)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    after = await statement_counters(host, port)
+
+    total = len(latencies) + sum(errors.values())
+    background = idle_rate * elapsed
+    load_round_trips = max(round_trips(before, after) - background, 0.0)
+    latencies.sort()
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "errors": dict(sorted(errors.items(), key=lambda item: -item[1])),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "db_round_trips_per_request": (
+            round(load_round_trips / total, 3) if total else 0.0
+        ),
+        "db_background_round_trips": round(background, 1),
+        "db": {
+            key: after[key] - before[key]
+            for key in (
+                "statements",
+                "commits",
+                "rollbacks",
+                "compiled_cache_hits",
+                "compiled_cache_misses",
+            )
+        },
+    }
+
+
+def git_commit() -> dict:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+
+    return {
+        "sha": git("rev-parse", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def start_app(port: int) -> subprocess.Popen:
+    """
+    Приложение из этого репозитория. Фоновые циклы выполняются один раз
+    при запуске и не повторяются во время измерения.
+    """
+    never = str(10**9)
+    env = {
+        **os.environ,
+        "APP_PORT": str(port),
+        "APP_HOST": "127.0.0.1",
+        "PARTITION_CHECK_INTERVAL": never,
+        "TOP_SELLERS_REFRESH_ENABLED": "false",
+        "TOP_SELLERS_REFRESH_INTERVAL": never,
+        "CATEGORY_TREE_RELOAD_INTERVAL": never,
+    }
+    return subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env)
+
+
+async def main_async(args) -> dict:
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    product_ids, order_ids = await load_ids(args.products, args.orders, args.seed)
+    if not product_ids or not order_ids:
+        raise SystemExit("В БД нет товаров или заказов, запустите с --seed")
+    app = start_app(port) if args.start_app else None
+    try:
+        await wait_ready(host, port, args.startup_timeout)
+        if args.warmup:
+            warmup = argparse.Namespace(**{**vars(args), "requests": args.warmup})
+            warmup.duration = None
+            await run_load(warmup, host, port, product_ids, order_ids)
+        idle_rate = await idle_round_trip_rate(host, port, args.idle_baseline)
+        result = await run_load(args, host, port, product_ids, order_ids, idle_rate)
+        app_settings = await get_json(host, port, "/metrics/settings")
+    finally:
+        if app:
+            app.terminate()
+            app.wait(timeout=30)
+    return {
+        "benchmark": "add_product_load",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "params": {
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "amount": args.amount,
+            "products": len(product_ids),
+            "orders": len(order_ids),
+            "product_dist": args.product_dist,
+            "order_dist": args.order_dist,
+            "zipf_s": args.zipf_s,
+            "seed": args.seed_value,
+        },
+        "app_settings": app_settings,
+        "result": result,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--url", default="http://127.0.0.1:8001")
+    parser.add_argument("--start-app", action="store_true")
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", action="store_true", help="создать товары и заказы")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--duration", type=float, help="секунды вместо --requests")
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--amount", type=int, default=1)
+    parser.add_argument("--product-dist", choices=("uniform", "zipf"), default="uniform")
+    parser.add_argument("--order-dist", choices=("uniform", "zipf"), default="uniform")
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument("--seed-value", type=int, default=0, help="seed генератора")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--idle-baseline",
+        type=float,
+        default=3.0,
+        help="секунды замера фоновых запросов к БД до нагрузки (0 — без вычета)",
+    )
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    output = args.output or (
+        ROOT
+        / "benchmarks"
+        / "results"
+        / f"add_product_load-{report['commit']['sha'][:8]}-"
+        f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(orjson.dumps(report["result"], option=orjson.OPT_INDENT_2).decode())
+    print(f"Результат сохранён в {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,51 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
+from src.api.category import router as category_router
+from src.api.customer import router as customer_router
+from src.api.metrics import router as metrics_router
+from src.api.nomenclature import router as nomenclature_router
 from src.api.product import router as products_router
+from src.api.report import router as report_router
 from src.core.config import settings
+from src.db.db import engine
+from src.db.partition import partition_manager
+from src.services.catalog import product_change_listener
+from src.services.category import category_tree_service
+from src.services.top_sellers import top_sellers_refresher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await partition_manager.start()
+    await top_sellers_refresher.start()
+    await category_tree_service.start()
+    await product_change_listener.start()
+    yield
+    await product_change_listener.stop()
+    await category_tree_service.stop()
+    await top_sellers_refresher.stop()
+    await partition_manager.stop()
+    await engine.dispose()
 
 
 def create_app():
     app = FastAPI(
         title=settings.app_title,
+        lifespan=lifespan,
         docs_url="/docs",
         openapi_url="/docs.json",
         default_response_class=ORJSONResponse,
     )
     app.include_router(products_router)
+    app.include_router(nomenclature_router)
+    app.include_router(customer_router)
+    app.include_router(category_router)
+    app.include_router(report_router)
+    app.include_router(metrics_router)
     return app
 
 
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, status
+
+from src.schemas.category import (
+    CategoryChildrenCountOut,
+    CategoryNodeOut,
+    CategorySubtreeOut,
+)
+from src.services.category import category_tree_service
+from src.tools.exception_route import ExceptionHandlingRoute
+
+router = APIRouter(
+    prefix="/categories", tags=["Categories"], route_class=ExceptionHandlingRoute
+)
+
+
+@router.get(
+    "/children_counts",
+    summary="Число прямых потомков каждой категории",
+    status_code=status.HTTP_200_OK,
+    response_model=list[CategoryChildrenCountOut],
+)
+async def get_children_counts():
+    return category_tree_service.get_children_counts()
+
+
+@router.get(
+    "/{category_id}",
+    summary="Категория: уровень, предки, категория 1 уровня",
+    status_code=status.HTTP_200_OK,
+    response_model=CategoryNodeOut,
+)
+async def get_category(category_id: int):
+    return category_tree_service.get_node(category_id)
+
+
+@router.get(
+    "/{root_id}/subtree/{category_id}",
+    summary="Входит ли категория в поддерево",
+    status_code=status.HTTP_200_OK,
+    response_model=CategorySubtreeOut,
+)
+async def check_subtree(root_id: int, category_id: int):
+    return category_tree_service.check_subtree(category_id, root_id)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import StreamingResponse
+
+from src.schemas.order import OrderPageOut, OrderPageQuery
+from src.services.order_listing import OrderListingService
+from src.tools.exception_route import ExceptionHandlingRoute
+
+router = APIRouter(
+    prefix="/customers", tags=["Customers"], route_class=ExceptionHandlingRoute
+)
+
+
+@router.get(
+    "/{customer_id}/orders",
+    summary="Заказы клиента (от новых к старым, пагинация курсором)",
+    status_code=status.HTTP_200_OK,
+    response_model=OrderPageOut,
+)
+async def get_customer_orders(customer_id: int, query: OrderPageQuery = Depends()):
+    return await OrderListingService().get_customer_orders(
+        customer_id, query.limit, query.cursor
+    )
+
+
+@router.get(
+    "/{customer_id}/orders/stream",
+    summary="Все заказы клиента потоком NDJSON",
+    status_code=status.HTTP_200_OK,
+)
+async def stream_customer_orders(customer_id: int):
+    return StreamingResponse(
+        OrderListingService().stream_customer_orders(customer_id),
+        media_type="application/x-ndjson",
+    )
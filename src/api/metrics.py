@@ -0,0 +1,69 @@
+from fastapi import APIRouter, status
+
+from src.core.config import settings
+from src.db.db import engine
+from src.db.pool import pool_metrics
+from src.db.statements import statement_metrics
+from src.services.reservation_batcher import reservation_batcher
+from src.tools.cache import cache_registry
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get(
+    "/db_pool",
+    summary="Состояние пула соединений с БД",
+    status_code=status.HTTP_200_OK,
+)
+async def get_db_pool_metrics():
+    return pool_metrics.snapshot(engine.sync_engine.pool)
+
+
+@router.get(
+    "/statements",
+    summary="Запросы к БД и попадания в кэш скомпилированных выражений",
+    status_code=status.HTTP_200_OK,
+)
+async def get_statement_metrics():
+    return statement_metrics.snapshot()
+
+
+@router.get(
+    "/caches",
+    summary="Статистика кэшей приложения",
+    status_code=status.HTTP_200_OK,
+)
+async def get_cache_metrics():
+    return [cache.stats() for cache in cache_registry.values()]
+
+
+@router.get(
+    "/reservation_batches",
+    summary="Статистика группировки списаний остатка",
+    status_code=status.HTTP_200_OK,
+)
+async def get_reservation_batch_metrics():
+    return reservation_batcher.stats()
+
+
+@router.get(
+    "/settings",
+    summary="Настройки приложения, влияющие на производительность",
+    status_code=status.HTTP_200_OK,
+)
+async def get_performance_settings():
+    return settings.model_dump(
+        include={
+            "add_product_fast_path",
+            "reservation_batching_enabled",
+            "reservation_batch_window_ms",
+            "reservation_batch_max_size",
+            "db_pool_enabled",
+            "db_pool_size",
+            "db_max_overflow",
+            "db_statement_cache_size",
+            "db_compiled_cache_size",
+            "product_cache_ttl",
+            "negative_cache_ttl",
+        }
+    )
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, status
+
+from src.schemas.product import CatalogProduct, ProductStockOut, StockBucketsIn
+from src.services.product import ProductService
+from src.tools.exception_route import ExceptionHandlingRoute
+
+router = APIRouter(
+    prefix="/products", tags=["Products"], route_class=ExceptionHandlingRoute
+)
+
+
+@router.get(
+    "/{nomenclature_id}",
+    summary="Получить товар из каталога",
+    status_code=status.HTTP_200_OK,
+    response_model=CatalogProduct,
+)
+async def get_product(nomenclature_id: int):
+    return await ProductService(nomenclature_id).check_product()
+
+
+@router.put(
+    "/{nomenclature_id}/stock_buckets",
+    summary="Разбить остаток товара на корзины (0 — объединить)",
+    status_code=status.HTTP_200_OK,
+    response_model=ProductStockOut,
+)
+async def set_stock_buckets(nomenclature_id: int, stock: StockBucketsIn):
+    return await ProductService(nomenclature_id).set_stock_buckets(stock.buckets)
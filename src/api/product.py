@@ -1,7 +1,19 @@
-from fastapi import APIRouter, status
+import orjson
+from fastapi import APIRouter, Depends, Request, Response, status
 
-from src.schemas.order import OrderOut, UpdateOrder
-from src.services.order import OrderService
+from src.core.config import settings
+from src.schemas.order import (
+    OrderBatchOut,
+    OrderImportOut,
+    OrderItemPageOut,
+    OrderItemPageQuery,
+    OrderOut,
+    UpdateOrder,
+    UpdateOrderBatch,
+)
+from src.services.order import OrderBatchService, OrderService
+from src.services.order_import import OrderImportService, iter_lines
+from src.services.order_listing import OrderListingService
 from src.tools.exception_route import ExceptionHandlingRoute
 
 router = APIRouter(
@@ -16,4 +28,46 @@ router = APIRouter(
     response_model=OrderOut,
 )
 async def add_product_to_order(order: UpdateOrder):
-    return await OrderService(**order.model_dump()).update_orderitem()
+    service = OrderService(order.nomenclature_id, order.order_id, order.amount)
+    if settings.add_product_fast_path:
+        return Response(
+            orjson.dumps(await service.add_orderitem_core()),
+            media_type="application/json",
+        )
+    return await service.update_orderitem()
+
+
+@router.post(
+    "/add_products",
+    summary="Добавить несколько товаров в заказ",
+    status_code=status.HTTP_200_OK,
+    response_model=OrderBatchOut,
+)
+async def add_products_to_order(order: UpdateOrderBatch):
+    return await OrderBatchService(
+        order_id=order.order_id,
+        items=order.items,
+        all_or_nothing=order.all_or_nothing,
+    ).update_orderitems()
+
+
+@router.post(
+    "/import",
+    summary="Загрузить заказы из NDJSON или CSV",
+    status_code=status.HTTP_200_OK,
+    response_model=OrderImportOut,
+)
+async def import_orders(request: Request, file_format: str = "ndjson"):
+    return await OrderImportService(file_format).run(iter_lines(request.stream()))
+
+
+@router.get(
+    "/{order_id}/items",
+    summary="Позиции заказа (пагинация по nomenclature_id)",
+    status_code=status.HTTP_200_OK,
+    response_model=OrderItemPageOut,
+)
+async def get_order_items(order_id: int, query: OrderItemPageQuery = Depends()):
+    return await OrderListingService().get_order_items(
+        order_id, query.limit, query.after
+    )
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, status
+
+from src.schemas.report import (
+    AnalyticsQuery,
+    CustomerTotalOut,
+    CustomerTotalsQuery,
+    MonthRevenueOut,
+    TopSellerOut,
+    TopSellersOut,
+)
+from src.services.analytics import analytics_executor
+from src.services.report import CustomerTotalService
+from src.services.top_sellers import top_sellers_refresher
+from src.tools.exception_route import ExceptionHandlingRoute
+
+router = APIRouter(
+    prefix="/reports", tags=["Reports"], route_class=ExceptionHandlingRoute
+)
+
+
+@router.get(
+    "/customer_totals",
+    summary="Суммы заказанных товаров по клиентам (по убыванию)",
+    status_code=status.HTTP_200_OK,
+    response_model=list[CustomerTotalOut],
+)
+async def get_customer_totals(query: CustomerTotalsQuery = Depends()):
+    return await CustomerTotalService().get_totals(query.limit, query.offset)
+
+
+@router.get(
+    "/customer_totals/{customer_id}",
+    summary="Сумма заказанных товаров клиента",
+    status_code=status.HTTP_200_OK,
+    response_model=CustomerTotalOut,
+)
+async def get_customer_total(customer_id: int):
+    return await CustomerTotalService().get_total(customer_id)
+
+
+@router.get(
+    "/top_sellers",
+    summary="Топ-5 товаров за прошлый месяц (снимок представления)",
+    status_code=status.HTTP_200_OK,
+    response_model=TopSellersOut,
+)
+async def get_top_sellers():
+    return await top_sellers_refresher.get()
+
+
+@router.get(
+    "/analytics/customer_totals",
+    summary="Суммы клиентов за период (параллельно по месячным партициям)",
+    status_code=status.HTTP_200_OK,
+    response_model=list[CustomerTotalOut],
+)
+async def get_period_customer_totals(query: AnalyticsQuery = Depends()):
+    return await analytics_executor.customer_totals(
+        query.date_from, query.date_to, query.limit
+    )
+
+
+@router.get(
+    "/analytics/top_sellers",
+    summary="Самые покупаемые товары за период (параллельно по месячным партициям)",
+    status_code=status.HTTP_200_OK,
+    response_model=list[TopSellerOut],
+)
+async def get_period_top_sellers(query: AnalyticsQuery = Depends()):
+    return await analytics_executor.top_sellers(
+        query.date_from, query.date_to, query.limit
+    )
+
+
+@router.get(
+    "/analytics/revenue_by_month",
+    summary="Выручка, заказы и позиции по месяцам",
+    status_code=status.HTTP_200_OK,
+    response_model=list[MonthRevenueOut],
+)
+async def get_revenue_by_month(query: AnalyticsQuery = Depends()):
+    return await analytics_executor.revenue_by_month(query.date_from, query.date_to)
@@ -0,0 +1,47 @@
+"""
+Загрузка заказов из файла NDJSON или CSV.
+
+Пример:
+    uv run python -m src.cli.import_orders orders.ndjson --chunk-size 50000
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator
+
+from src.db.db import engine
+from src.db.partition import partition_manager
+from src.services.order_import import IMPORT_FORMATS, OrderImportService
+
+
+async def read_lines(path: Path) -> AsyncIterator[str]:
+    with path.open(encoding="utf-8", newline="") as file:
+        for line in file:
+            yield line.rstrip("\r\n")
+
+
+async def main(path: Path, file_format: str, chunk_size: int | None) -> None:
+    try:
+        await partition_manager.load()
+        result = await OrderImportService(file_format, chunk_size).run(
+            read_lines(path)
+        )
+        print(result.model_dump_json(indent=2))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Загрузка заказов через COPY")
+    parser.add_argument("path", type=Path)
+    parser.add_argument(
+        "--format",
+        dest="file_format",
+        choices=IMPORT_FORMATS,
+        help="по умолчанию определяется по расширению файла",
+    )
+    parser.add_argument("--chunk-size", type=int)
+    args = parser.parse_args()
+    file_format = args.file_format or args.path.suffix.lstrip(".").lower()
+    asyncio.run(main(args.path, file_format, args.chunk_size))
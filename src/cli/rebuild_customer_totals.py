@@ -0,0 +1,26 @@
+"""
+Пересчёт сумм заказанных товаров по клиентам (таблица customertotal).
+
+Сверочная задача: запускается по расписанию (cron) или после ручных
+изменений orderitem в обход приложения.
+
+Пример:
+    uv run python -m src.cli.rebuild_customer_totals
+"""
+
+import asyncio
+
+from src.db.db import engine
+from src.services.report import CustomerTotalService
+
+
+async def main() -> None:
+    try:
+        result = await CustomerTotalService().rebuild()
+        print(result.model_dump_json(indent=2))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+from datetime import date
+
+from sqlalchemy import Row, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.base import DBBase, ModelType
+from src.models.models import Category, Customer, Nomenclature, Order, OrderItem
+
+
+class AnalyticsCRUD(DBBase):
+    """
+    Частичные агрегаты отчётов за один месяц.
+
+    Условие на created_at не выходит за границы месячной партиции,
+    поэтому каждый запрос читает одну партицию "order" или orderitem.
+    """
+
+    def __init__(
+        self,
+        model: type[ModelType] = Order,
+        session: AsyncSession | None = None,
+    ) -> None:
+        super().__init__(model=model, session=session)
+
+    @staticmethod
+    def _top(stmt: Select, key, total, limit: int | None, ids: list[int] | None):
+        if ids is not None:
+            stmt = stmt.where(key.in_(ids))
+        if limit is not None:
+            stmt = stmt.order_by(total.desc(), key).limit(limit)
+        return stmt
+
+    async def customer_sums(
+        self,
+        start: date,
+        end: date,
+        limit: int | None = None,
+        customer_ids: list[int] | None = None,
+    ) -> list[Row]:
+        """
+        (customer_id, total_sum) по итогам заказов месяца: limit клиентов
+        с наибольшей суммой (по убыванию) и/или только customer_ids.
+        """
+        total = func.sum(Order.total_sum)
+        stmt = (
+            select(Order.customer_id, total)
+            .where(
+                Order.created_at >= start,
+                Order.created_at < end,
+                Order.customer_id.is_not(None),
+            )
+            .group_by(Order.customer_id)
+        )
+        query = await self.session.execute(
+            self._top(stmt, Order.customer_id, total, limit, customer_ids)
+        )
+        return query.all()
+
+    async def product_amounts(
+        self,
+        start: date,
+        end: date,
+        limit: int | None = None,
+        nomenclature_ids: list[int] | None = None,
+    ) -> list[Row]:
+        """
+        (nomenclature_id, total_amount) по позициям заказов месяца: limit
+        товаров с наибольшим количеством (по убыванию) и/или только
+        nomenclature_ids.
+        """
+        total = func.sum(OrderItem.amount)
+        stmt = (
+            select(OrderItem.nomenclature_id, total)
+            .where(OrderItem.created_at >= start, OrderItem.created_at < end)
+            .group_by(OrderItem.nomenclature_id)
+        )
+        query = await self.session.execute(
+            self._top(stmt, OrderItem.nomenclature_id, total, limit, nomenclature_ids)
+        )
+        return query.all()
+
+    async def revenue(self, start: date, end: date) -> Row:
+        """(revenue, orders, items) за месяц."""
+        query = await self.session.execute(
+            select(
+                func.coalesce(func.sum(Order.total_sum), 0),
+                func.count(),
+                func.coalesce(func.sum(Order.item_count), 0),
+            ).where(Order.created_at >= start, Order.created_at < end)
+        )
+        return query.one()
+
+    async def customer_names(self, customer_ids: list[int]) -> dict[int, str]:
+        query = await self.session.execute(
+            select(Customer.id, Customer.name).where(Customer.id.in_(customer_ids))
+        )
+        return dict(query.all())
+
+    async def product_names(self, nomenclature_ids: list[int]) -> dict[int, Row]:
+        """id товара -> (name, category_name) через top_category_id."""
+        query = await self.session.execute(
+            select(Nomenclature.id, Nomenclature.name, Category.name.label("category"))
+            .outerjoin(Category, Category.id == Nomenclature.top_category_id)
+            .where(Nomenclature.id.in_(nomenclature_ids))
+        )
+        return {row.id: row for row in query.all()}
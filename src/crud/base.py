@@ -1,14 +1,25 @@
 from abc import ABC, abstractmethod
-from typing import Any, Generic, Sequence, Type, TypeVar
+from typing import Any, AsyncIterator, Generic, Sequence, Type, TypeVar
 
 from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import Row, RowMapping, select
+from sqlalchemy import (
+    Row,
+    RowMapping,
+    Select,
+    bindparam,
+    insert,
+    inspect,
+    select,
+    update,
+)
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
-from src.db.db import Base, async_session
-from src.tools.exceptions import ObjectNotFoundExceptionError
+from src.core.config import settings
+from src.db.db import Base, async_session, engine
+from src.db.statements import statement_cache
+from src.tools.exceptions import BadRequestExceptionError, ObjectNotFoundExceptionError
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -33,42 +44,162 @@ class DB(ABC, Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
 
 class DBBase(DB, Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]) -> None:
+    """
+    Базовый CRUD.
+
+    Без переданной сессии открывает собственную в ``async with`` и фиксирует
+    каждую запись. С сессией UnitOfWork только отправляет изменения в БД
+    (flush), а фиксацию выполняет UnitOfWork.
+    """
+
+    def __init__(
+        self,
+        model: Type[ModelType],
+        session: AsyncSession | AsyncConnection | None = None,
+    ) -> None:
         super().__init__(model=model)
-        self.session: AsyncSession
+        self.session: AsyncSession | AsyncConnection | None = session
+        self._external_session = session is not None
 
     async def __aenter__(self):
-        async with async_session() as session:
-            self.session = session
+        if not self._external_session:
+            self.session = async_session()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.session.close()
-        self.session = None
+        if not self._external_session:
+            await self.session.close()
+            self.session = None
+
+    async def save(self) -> None:
+        """
+        Фиксация изменений собственной сессии или flush в UnitOfWork.
+
+        В соединении CoreUnitOfWork ничего не делает: запросы уже выполнены.
+        """
+        if not self._external_session:
+            await self.session.commit()
+        elif isinstance(self.session, AsyncSession):
+            await self.session.flush()
 
     async def get(self) -> Sequence[Row | RowMapping | Any]:
         return (await self.session.scalars(select(self._model))).all()
 
-    async def get_by(self, **kwargs) -> ModelType | None:
+    def _stream_stmt(self, columns: Sequence[str] | None, filters: dict) -> Select:
+        try:
+            stmt = (
+                select(*(getattr(self._model, column) for column in columns))
+                if columns
+                else select(self._model)
+            )
+            for attr, value in filters.items():
+                stmt = stmt.where(getattr(self._model, attr) == value)
+        except AttributeError as err:
+            raise BadRequestExceptionError(f"У модели {self._model}: {err}")
+        return stmt
+
+    async def stream_stmt(
+        self, stmt: Select, chunk_size: int | None = None, scalars: bool = False
+    ) -> AsyncIterator[Any]:
+        """
+        Построчный обход результата запроса через серверный курсор.
+
+        Из БД читается по chunk_size строк, в памяти одновременно находится
+        одна порция. Требует собственной транзакции на время обхода.
+        """
+        stmt = stmt.execution_options(
+            yield_per=chunk_size or settings.stream_chunk_size
+        )
+        result = await (
+            self.session.stream_scalars(stmt) if scalars else self.session.stream(stmt)
+        )
+        async for item in result:
+            yield item
+
+    async def stream(
+        self,
+        columns: Sequence[str] | None = None,
+        chunk_size: int | None = None,
+        **filters,
+    ) -> AsyncIterator[ModelType | Row]:
+        """
+        Обход всей таблицы (или строк с filters) без загрузки в память.
+
+        Без columns возвращает объекты модели, с columns — строки только
+        с перечисленными столбцами (без создания объектов ORM).
+
+        Пример:
+            async with ProductCRUD() as crud:
+                async for row in crud.stream(columns=["id", "amount"]):
+                    ...
+        """
+        stmt = self._stream_stmt(columns, filters)
+        async for item in self.stream_stmt(stmt, chunk_size, scalars=not columns):
+            yield item
+
+    async def stream_chunks(
+        self,
+        columns: Sequence[str] | None = None,
+        chunk_size: int | None = None,
+        **filters,
+    ) -> AsyncIterator[Sequence[ModelType | Row]]:
+        """То же, что stream, но порциями по chunk_size (для пакетной обработки)."""
+        chunk_size = chunk_size or settings.stream_chunk_size
+        stmt = self._stream_stmt(columns, filters).execution_options(
+            yield_per=chunk_size
+        )
+        result = await (
+            self.session.stream(stmt)
+            if columns
+            else self.session.stream_scalars(stmt)
+        )
+        async for chunk in result.partitions(chunk_size):
+            yield chunk
+
+    def _get_by_stmt(self, attrs: tuple[str, ...]) -> Select:
         stmt = select(self._model)
-        for attr, value in kwargs.items():
-            if value is not None:
-                try:
-                    stmt = stmt.where(getattr(self._model, attr) == value)
-                except AttributeError:
-                    logger.info(f"У модели {self._model} нет аттрибута {attr}")
-                    continue
-        return await self.session.scalar(stmt)
+        for attr in attrs:
+            try:
+                stmt = stmt.where(getattr(self._model, attr) == bindparam(attr))
+            except AttributeError:
+                logger.info(f"У модели {self._model} нет аттрибута {attr}")
+                continue
+        return stmt
+
+    async def get_by(self, **kwargs) -> ModelType | None:
+        """
+        Объект по равенству полей (None-значения не учитываются).
+
+        Выражение строится один раз для модели и набора полей и берётся
+        из statement_cache, значения передаются параметрами.
+        """
+        params = {attr: value for attr, value in kwargs.items() if value is not None}
+        attrs = tuple(sorted(params))
+        stmt = statement_cache.get(
+            ("get_by", self._model, attrs), lambda: self._get_by_stmt(attrs)
+        )
+        return await self.session.scalar(stmt, params)
 
     async def create(self, db_obj: CreateSchemaType) -> ModelType | None:
-        db_obj = self._model(**db_obj.model_dump())
+        """
+        Вставка одним запросом INSERT ... RETURNING.
+
+        Значения, заполняемые сервером (id, created_at), приходят в ответе
+        на вставку; сессии создаются с expire_on_commit=False, поэтому
+        объект не перечитывается после фиксации.
+        """
         try:
-            self.session.add(db_obj)
-            await self.session.commit()
-            await self.session.refresh(db_obj)
+            db_obj = await self.session.scalar(
+                insert(self._model)
+                .values(**db_obj.model_dump())
+                .returning(self._model)
+            )
+            await self.save()
             return db_obj
         except SQLAlchemyError as err:
             logger.error(err)
+            if self._external_session:
+                raise
             await self.session.rollback()
 
     async def update(
@@ -76,13 +207,104 @@ class DBBase(DB, Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_id: int | str,
         obj_in: UpdateSchemaType | dict,
     ) -> ModelType:
+        """
+        Изменение по id одним запросом UPDATE ... RETURNING, без чтения строки.
+
+        Учитываются только столбцы модели со значением не None.
+        """
         obj_in = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
-        db_obj = await self.get_by(id=obj_id)
+        columns = inspect(self._model).column_attrs
+        values = {
+            field: value
+            for field, value in obj_in.items()
+            if value is not None and field in columns
+        }
+        if not values:
+            db_obj = await self.get_by(id=obj_id)
+        else:
+            db_obj = await self.session.scalar(
+                update(self._model)
+                .where(self._model.id == obj_id)
+                .values(**values)
+                .returning(self._model)
+            )
         if not db_obj:
             raise ObjectNotFoundExceptionError()
-        for field, value in obj_in.items():
-            if value is not None and field in db_obj.to_dict():
-                setattr(db_obj, field, value)
-        await self.session.commit()
-        await self.session.refresh(db_obj)
+        await self.save()
         return db_obj
+
+
+class UnitOfWork:
+    """
+    Единица работы: одна сессия и одна транзакция на несколько CRUD.
+
+    Фиксирует транзакцию при выходе из ``async with`` без ошибок,
+    иначе откатывает её.
+
+    Пример:
+        async with UnitOfWork() as uow:
+            product_crud = uow.crud(ProductCRUD)
+            ...
+    """
+
+    def __init__(self) -> None:
+        self.session: AsyncSession | None = None
+
+    async def __aenter__(self):
+        self.session = async_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                await self.session.commit()
+            else:
+                await self.session.rollback()
+        finally:
+            await self.session.close()
+            self.session = None
+
+    async def rollback(self) -> None:
+        """Откат изменений; при выходе фиксируется пустая транзакция."""
+        await self.session.rollback()
+
+    def crud(self, crud_class: Type[DBBase]) -> DBBase:
+        """CRUD, работающий в сессии этой единицы работы."""
+        return crud_class(session=self.session)
+
+
+class CoreUnitOfWork:
+    """
+    Единица работы на соединении SQLAlchemy Core, без ORM-сессии.
+
+    CRUD получает AsyncConnection вместо сессии: запросы с RETURNING
+    возвращают строки Row, объекты моделей и identity map не создаются.
+    Подходит только для методов CRUD, выполняющих запросы (execute/scalar),
+    а не для create/update/get_by, работающих с моделями.
+
+    Пример:
+        async with CoreUnitOfWork() as uow:
+            row = await uow.crud(OrderItemCRUD).upsert(...)
+    """
+
+    def __init__(self) -> None:
+        self.connection: AsyncConnection | None = None
+
+    async def __aenter__(self):
+        self.connection = await engine.connect()
+        await self.connection.begin()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                await self.connection.commit()
+            else:
+                await self.connection.rollback()
+        finally:
+            await self.connection.close()
+            self.connection = None
+
+    def crud(self, crud_class: Type[DBBase]) -> DBBase:
+        """CRUD, выполняющий запросы в соединении этой единицы работы."""
+        return crud_class(session=self.connection)
@@ -0,0 +1,21 @@
+from sqlalchemy import Row, Text, cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.base import DBBase, ModelType
+from src.models.models import Category
+
+
+class CategoryCRUD(DBBase):
+    def __init__(
+        self,
+        model: type[ModelType] = Category,
+        session: AsyncSession | None = None,
+    ) -> None:
+        super().__init__(model=model, session=session)
+
+    async def get_paths(self) -> list[Row]:
+        """Все категории: (id, name, path строкой)."""
+        query = await self.session.execute(
+            select(Category.id, Category.name, cast(Category.path, Text))
+        )
+        return query.all()
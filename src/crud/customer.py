@@ -0,0 +1,148 @@
+from sqlalchemy import Row, Select, and_, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.base import DBBase, ModelType
+from src.models.models import Customer, CustomerTotal, Order, OrderItem
+
+
+class CustomerTotalCRUD(DBBase):
+    """
+    Суммы заказанных товаров по клиентам.
+
+    Суммы меняются на приращение amount * price в том же запросе, что и
+    позиции заказа (OrderItemCRUD), поэтому чтение отчёта — поиск по индексу,
+    а не агрегация orderitem.
+    """
+
+    def __init__(
+        self,
+        model: type[ModelType] = CustomerTotal,
+        session: AsyncSession | None = None,
+    ) -> None:
+        super().__init__(model=model, session=session)
+
+    @staticmethod
+    def add_stmt(deltas: Select):
+        """
+        Прибавление сумм к итогам клиентов.
+
+        deltas: строки (order_id, created_at, delta). Клиенты обновляются
+        в порядке id, чтобы параллельные транзакции не блокировали друг друга
+        в разном порядке.
+        """
+        deltas = deltas.subquery("deltas")
+        source = (
+            select(Order.customer_id, func.sum(deltas.c.delta))
+            .select_from(deltas)
+            .join(
+                Order,
+                and_(
+                    Order.id == deltas.c.order_id,
+                    Order.created_at == deltas.c.created_at,
+                ),
+            )
+            .where(Order.customer_id.is_not(None))
+            .group_by(Order.customer_id)
+            .order_by(Order.customer_id)
+        )
+        stmt = insert(CustomerTotal).from_select(["customer_id", "total_sum"], source)
+        return stmt.on_conflict_do_update(
+            index_elements=[CustomerTotal.customer_id],
+            set_={"total_sum": CustomerTotal.total_sum + stmt.excluded.total_sum},
+        )
+
+    async def get_total(self, customer_id: int) -> Row | None:
+        """Сумма клиента; 0, если у клиента ещё нет позиций заказов."""
+        query = await self.session.execute(
+            select(
+                Customer.id.label("customer_id"),
+                Customer.name,
+                func.coalesce(CustomerTotal.total_sum, 0).label("total_sum"),
+            )
+            .outerjoin(CustomerTotal, CustomerTotal.customer_id == Customer.id)
+            .where(Customer.id == customer_id)
+        )
+        return query.one_or_none()
+
+    async def get_totals(self, limit: int, offset: int = 0) -> list[Row]:
+        """Клиенты по убыванию суммы (индекс idx_customertotal_total_sum)."""
+        query = await self.session.execute(
+            select(
+                CustomerTotal.customer_id,
+                Customer.name,
+                CustomerTotal.total_sum,
+            )
+            .join(Customer, Customer.id == CustomerTotal.customer_id)
+            .order_by(CustomerTotal.total_sum.desc(), CustomerTotal.customer_id)
+            .limit(limit)
+            .offset(offset)
+        )
+        return query.all()
+
+    async def rebuild_batch(self, after: int, limit: int) -> list[int]:
+        """
+        Пересчёт сумм по orderitem для limit клиентов с id больше after.
+
+        Строки customertotal клиентов пакета создаются (если их нет)
+        и блокируются в порядке id: транзакции, уже изменившие их суммы,
+        успевают завершиться до подсчёта, а начавшие добавление позиции
+        позже ждут только этот пакет и прибавляют приращение к новой сумме.
+        Остальные клиенты не блокируются. Возвращает id клиентов пакета.
+        """
+        customer_ids = list(
+            await self.session.scalars(
+                select(Customer.id)
+                .where(Customer.id > after)
+                .order_by(Customer.id)
+                .limit(limit)
+            )
+        )
+        if not customer_ids:
+            return customer_ids
+        await self.session.execute(
+            insert(CustomerTotal)
+            .from_select(
+                ["customer_id", "total_sum"],
+                select(Customer.id, literal(0))
+                .where(Customer.id.in_(customer_ids))
+                .order_by(Customer.id),
+            )
+            .on_conflict_do_nothing(index_elements=[CustomerTotal.customer_id])
+        )
+        await self.session.execute(
+            select(CustomerTotal.customer_id)
+            .where(CustomerTotal.customer_id.in_(customer_ids))
+            .order_by(CustomerTotal.customer_id)
+            .with_for_update()
+        )
+        sums = (
+            select(
+                Order.customer_id,
+                func.sum(OrderItem.amount * OrderItem.price).label("total_sum"),
+            )
+            .join(
+                OrderItem,
+                and_(
+                    OrderItem.order_id == Order.id,
+                    OrderItem.created_at == Order.created_at,
+                ),
+            )
+            .where(Order.customer_id.in_(customer_ids))
+            .group_by(Order.customer_id)
+            .subquery("sums")
+        )
+        await self.session.execute(
+            update(CustomerTotal)
+            .where(CustomerTotal.customer_id.in_(customer_ids))
+            .values(
+                total_sum=func.coalesce(
+                    select(sums.c.total_sum)
+                    .where(sums.c.customer_id == CustomerTotal.customer_id)
+                    .scalar_subquery(),
+                    0,
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return customer_ids
@@ -1,41 +1,509 @@
-from sqlalchemy import func, select
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Iterable, Sequence
+
+from sqlalchemy import (
+    CTE,
+    Boolean,
+    Integer,
+    Numeric,
+    Row,
+    Select,
+    and_,
+    bindparam,
+    column,
+    func,
+    literal_column,
+    select,
+    text,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
 from src.crud.base import DBBase, ModelType
-from src.models.models import Customer, Order, OrderItem
-from src.schemas.order import UpdateOrder
+from src.crud.customer import CustomerTotalCRUD
+from src.db.statements import statement_cache
+from src.models.models import Customer, CustomerTotal, Order, OrderItem, OrderLocator
 
 
 class OrderItemCRUD(DBBase):
-    def __init__(self, model: type[ModelType] = OrderItem) -> None:
-        super().__init__(model=model)
+    def __init__(
+        self,
+        model: type[ModelType] = OrderItem,
+        session: AsyncSession | AsyncConnection | None = None,
+    ) -> None:
+        super().__init__(model=model, session=session)
+
+    async def get_order_sum(self) -> list[Row]:
+        """
+        Получение информации о сумме товаров заказанных для каждого клиента.
 
-    async def get_order_sum(self) -> int:
-        """Получение информации о сумме товаров заказанных для каждого клиента."""
+        Суммы читаются из CustomerTotal, orderitem не агрегируется.
+        """
         query = await self.session.execute(
             select(
                 Customer.name,
-                func.coalesce(func.sum(OrderItem.amount * OrderItem.price), 0),
+                func.coalesce(CustomerTotal.total_sum, 0),
+            ).outerjoin(CustomerTotal, CustomerTotal.customer_id == Customer.id)
+        )
+        return query.all()
+
+    async def upsert(
+        self,
+        order_id: int,
+        nomenclature_id: int,
+        amount: int,
+        price: Decimal,
+    ) -> Row | None:
+        """
+        Добавление товара в заказ одним запросом.
+
+        Создаёт позицию заказа или увеличивает её количество, если позиция
+        с таким (order_id, nomenclature_id) уже есть. Возвращает итоговую
+        позицию или None, если заказ не найден.
+        """
+        stmt = statement_cache.get("order_item.upsert", self._upsert_one_stmt)
+        return (
+            await self.session.execute(
+                stmt,
+                {
+                    "order_id": order_id,
+                    "nomenclature_id": nomenclature_id,
+                    "amount": amount,
+                    "price": price,
+                },
             )
-            .join(Order, Order.customer_id == Customer.id, isouter=True)
-            .join(OrderItem, Order.id == OrderItem.order_id, isouter=True)
-            .group_by(Customer.id)
+        ).one_or_none()
+
+    @classmethod
+    def _upsert_one_stmt(cls) -> Select:
+        source = select(
+            OrderLocator.order_id,
+            OrderLocator.created_at,
+            bindparam("nomenclature_id", type_=Integer).label("nomenclature_id"),
+            bindparam("amount", type_=Integer).label("amount"),
+            bindparam("price", type_=Numeric).label("price"),
+        ).where(OrderLocator.order_id == bindparam("order_id", type_=Integer))
+        return cls._upsert_stmt(source)
+
+    async def upsert_many(
+        self,
+        order_id: int,
+        lines: list[tuple[int, int, Decimal]],
+    ) -> Sequence[Row]:
+        """
+        Добавление нескольких товаров в заказ одним запросом.
+
+        lines: (nomenclature_id, amount, price). Возвращает итоговые позиции
+        или пустой список, если заказ не найден.
+        """
+        return await self.upsert_lines(
+            [
+                (order_id, nomenclature_id, amount, price)
+                for nomenclature_id, amount, price in lines
+            ]
         )
-        return query.scalars().all()
 
-    async def update(
+    async def upsert_lines(
+        self, lines: list[tuple[int, int, int, Decimal]]
+    ) -> Sequence[Row]:
+        """
+        Добавление товаров в разные заказы одним запросом.
+
+        lines: (order_id, nomenclature_id, amount, price), пары
+        (order_id, nomenclature_id) не должны повторяться. Строки
+        несуществующих заказов пропускаются.
+        """
+        data = values(
+            column("order_id", Integer),
+            column("nomenclature_id", Integer),
+            column("amount", Integer),
+            column("price", Numeric),
+            name="lines",
+        ).data(lines)
+        source = select(
+            OrderLocator.order_id,
+            OrderLocator.created_at,
+            data.c.nomenclature_id,
+            data.c.amount,
+            data.c.price,
+        ).where(OrderLocator.order_id == data.c.order_id)
+        return (await self.session.execute(self._upsert_stmt(source))).all()
+
+    @staticmethod
+    def _upsert_stmt(source: Select):
+        """
+        Заказ ищется через OrderLocator: created_at заказа берётся из индекса,
+        а наличие заказа в нужной партиции проверяет внешний ключ orderitem.
+
+        В том же запросе приращение amount * price (по цене, с которой позиция
+        хранится в заказе) прибавляется к Order.total_sum и CustomerTotal,
+        а новые позиции (xmax = 0) — к Order.item_count (см. _totals_ctes).
+        """
+        lines = source.cte("lines")
+        stmt = insert(OrderItem).from_select(
+            ["order_id", "created_at", "nomenclature_id", "amount", "price"],
+            select(
+                lines.c.order_id,
+                lines.c.created_at,
+                lines.c.nomenclature_id,
+                lines.c.amount,
+                lines.c.price,
+            ),
+        )
+        upserted = (
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    OrderItem.order_id,
+                    OrderItem.nomenclature_id,
+                    OrderItem.created_at,
+                ],
+                set_={"amount": OrderItem.amount + stmt.excluded.amount},
+            )
+            .returning(
+                OrderItem.order_id,
+                OrderItem.nomenclature_id,
+                OrderItem.amount,
+                OrderItem.price,
+                OrderItem.created_at,
+                literal_column("xmax = 0", Boolean).label("inserted"),
+            )
+            .cte("upserted")
+        )
+        deltas = (
+            select(
+                upserted.c.order_id,
+                upserted.c.created_at,
+                (lines.c.amount * upserted.c.price).label("delta"),
+                upserted.c.inserted,
+            )
+            .join(
+                lines,
+                and_(
+                    lines.c.order_id == upserted.c.order_id,
+                    lines.c.nomenclature_id == upserted.c.nomenclature_id,
+                ),
+            )
+            .cte("deltas")
+        )
+        return select(
+            upserted.c.order_id,
+            upserted.c.nomenclature_id,
+            upserted.c.amount,
+            upserted.c.created_at,
+        ).add_cte(*OrderItemCRUD._totals_ctes(deltas))
+
+    @staticmethod
+    def _totals_ctes(deltas: CTE) -> tuple[CTE, CTE]:
+        """
+        Обновление Order.total_sum / item_count и CustomerTotal по приращениям.
+
+        deltas: (order_id, created_at, delta, inserted). Строки заказов
+        блокируются в порядке id.
+        """
+        order_deltas = (
+            select(
+                deltas.c.order_id,
+                deltas.c.created_at,
+                func.sum(deltas.c.delta).label("delta"),
+                func.count().filter(deltas.c.inserted).label("inserted"),
+            )
+            .group_by(deltas.c.order_id, deltas.c.created_at)
+            .subquery("order_deltas")
+        )
+        locked = (
+            select(Order.id, Order.created_at)
+            .where(
+                tuple_(Order.id, Order.created_at).in_(
+                    select(deltas.c.order_id, deltas.c.created_at)
+                )
+            )
+            .order_by(Order.id)
+            .with_for_update()
+            .subquery("locked")
+        )
+        orders = (
+            update(Order)
+            .values(
+                total_sum=Order.total_sum + order_deltas.c.delta,
+                item_count=Order.item_count + order_deltas.c.inserted,
+            )
+            .where(
+                Order.id == order_deltas.c.order_id,
+                Order.created_at == order_deltas.c.created_at,
+                Order.id == locked.c.id,
+                Order.created_at == locked.c.created_at,
+            )
+            .cte("orders")
+        )
+        totals = CustomerTotalCRUD.add_stmt(
+            select(deltas.c.order_id, deltas.c.created_at, deltas.c.delta)
+        ).cte("totals")
+        return orders, totals
+
+    async def get_order_items(
         self,
-        db_obj: OrderItem,
-        obj_in: UpdateOrder,
-    ) -> Order:
-        obj_in = obj_in.model_dump()
-        for field, value in obj_in.items():
-            if value is not None and field in db_obj.to_dict():
-                setattr(db_obj, field, value)
-        await self.session.commit()
-        await self.session.refresh(db_obj)
-        return db_obj
+        order_id: int,
+        created_at: datetime,
+        limit: int,
+        after: int | None = None,
+    ) -> list[Row]:
+        """
+        Позиции заказа по возрастанию nomenclature_id (первичный ключ).
+
+        created_at заказа передаётся явно: читается одна партиция orderitem.
+        """
+        stmt = select(OrderItem.nomenclature_id, OrderItem.amount, OrderItem.price).where(
+            OrderItem.order_id == order_id, OrderItem.created_at == created_at
+        )
+        if after is not None:
+            stmt = stmt.where(OrderItem.nomenclature_id > after)
+        query = await self.session.execute(
+            stmt.order_by(OrderItem.nomenclature_id).limit(limit)
+        )
+        return query.all()
 
 
 class OrderCRUD(DBBase):
-    def __init__(self, model: type[ModelType] = Order) -> None:
-        super().__init__(model=model)
+    def __init__(
+        self,
+        model: type[ModelType] = Order,
+        session: AsyncSession | AsyncConnection | None = None,
+    ) -> None:
+        super().__init__(model=model, session=session)
+
+    async def locate(self, order_id: int) -> datetime | None:
+        """created_at заказа (ключ партиции) по индексу OrderLocator."""
+        stmt = statement_cache.get(
+            "order.locate",
+            lambda: select(OrderLocator.created_at).where(
+                OrderLocator.order_id == bindparam("order_id", type_=Integer)
+            ),
+        )
+        return await self.session.scalar(stmt, {"order_id": order_id})
+
+    async def existing_ids(self, order_ids: Iterable[int]) -> set[int]:
+        """id заказов из order_ids, которые есть в OrderLocator."""
+        stmt = statement_cache.get(
+            "order.existing_ids",
+            lambda: select(OrderLocator.order_id).where(
+                OrderLocator.order_id.in_(bindparam("order_ids", expanding=True))
+            ),
+        )
+        return set(await self.session.scalars(stmt, {"order_ids": list(order_ids)}))
+
+    @staticmethod
+    def _customer_orders_stmt(customer_id: int) -> Select:
+        """
+        Заказы клиента от новых к старым по (created_at, id).
+
+        Порядок совпадает с idx_order_customer_created, а партиции "order"
+        упорядочены по created_at: LIMIT дочитывает только нужные партиции.
+        """
+        return (
+            select(
+                Order.id,
+                Order.customer_id,
+                Order.created_at,
+                Order.total_sum,
+                Order.item_count,
+            )
+            .where(Order.customer_id == customer_id)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+        )
+
+    async def get_customer_orders(
+        self,
+        customer_id: int,
+        limit: int,
+        before: tuple[datetime, int] | None = None,
+    ) -> list[Row]:
+        """Страница заказов клиента, идущих после курсора before."""
+        stmt = self._customer_orders_stmt(customer_id)
+        if before is not None:
+            stmt = stmt.where(
+                tuple_(Order.created_at, Order.id) < tuple_(*before)
+            )
+        return (await self.session.execute(stmt.limit(limit))).all()
+
+    def stream_customer_orders(
+        self, customer_id: int, chunk_size: int | None = None
+    ) -> AsyncIterator[Row]:
+        """Все заказы клиента через серверный курсор, chunk_size строк за раз."""
+        return self.stream_stmt(self._customer_orders_stmt(customer_id), chunk_size)
+
+
+class OrderImportCRUD(DBBase):
+    """
+    Массовая загрузка заказов через промежуточную временную таблицу.
+
+    Строки загружаются в import_orderitem командой COPY, затем переносятся
+    в "order" и orderitem двумя запросами INSERT ... SELECT. Заказы,
+    противоречащие существующим по created_at, из порции удаляются.
+
+    Временная таблица существует только в своём соединении, поэтому CRUD
+    работает с одним AsyncConnection на всю загрузку (session), а не
+    с сессией, возвращающей соединение в пул после каждого commit.
+    """
+
+    staging_table = "import_orderitem"
+    staging_columns = (
+        "order_id",
+        "created_at",
+        "customer_id",
+        "nomenclature_id",
+        "amount",
+        "price",
+    )
+
+    def __init__(
+        self,
+        model: type[ModelType] = Order,
+        session: AsyncConnection | None = None,
+    ) -> None:
+        super().__init__(model=model, session=session)
+
+    async def create_staging(self) -> None:
+        await self.drop_staging()
+        await self.session.execute(
+            text(
+                f"""
+                CREATE TEMP TABLE {self.staging_table} (
+                    order_id integer NOT NULL,
+                    created_at timestamptz NOT NULL,
+                    customer_id integer,
+                    nomenclature_id integer,
+                    amount integer,
+                    price numeric
+                ) ON COMMIT PRESERVE ROWS
+                """
+            )
+        )
+
+    async def copy_to_staging(self, records: Iterable[tuple]) -> None:
+        """Загрузка строк в промежуточную таблицу через asyncpg COPY."""
+        raw_connection = await self.session.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            self.staging_table, records=records, columns=self.staging_columns
+        )
+
+    async def staged_months(self) -> list[date]:
+        result = await self.session.execute(
+            text(
+                f"SELECT DISTINCT date_trunc('month', created_at)::date "
+                f"FROM {self.staging_table}"
+            )
+        )
+        return list(result.scalars().all())
+
+    async def reject_conflicts(self) -> tuple[list[int], int]:
+        """
+        Удаление из порции заказов с неоднозначной датой создания.
+
+        Заказ отклоняется, если в порции у него несколько разных created_at
+        или он уже есть в orderlocator с другой created_at. Возвращает
+        отклонённые id заказов и число удалённых строк.
+        """
+        result = await self.session.execute(
+            text(
+                f"""
+                WITH conflicts AS (
+                    SELECT order_id
+                    FROM {self.staging_table}
+                    GROUP BY order_id
+                    HAVING count(DISTINCT created_at) > 1
+                    UNION
+                    SELECT s.order_id
+                    FROM {self.staging_table} s
+                    JOIN orderlocator l
+                        ON l.order_id = s.order_id AND l.created_at <> s.created_at
+                )
+                DELETE FROM {self.staging_table} s
+                USING conflicts c
+                WHERE s.order_id = c.order_id
+                RETURNING s.order_id
+                """
+            )
+        )
+        rejected = result.scalars().all()
+        return sorted(set(rejected)), len(rejected)
+
+    async def merge_orders(self) -> int:
+        """
+        Вставка новых заказов порции; заказы из orderlocator пропускаются.
+
+        Вызывается после reject_conflicts: у каждого order_id в порции одна
+        created_at, customer_id берётся первый непустой по значению.
+        """
+        result = await self.session.execute(
+            text(
+                f"""
+                INSERT INTO "order" (id, created_at, customer_id)
+                SELECT DISTINCT ON (s.order_id) s.order_id, s.created_at, s.customer_id
+                FROM {self.staging_table} s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM orderlocator l WHERE l.order_id = s.order_id
+                )
+                ORDER BY s.order_id, s.customer_id NULLS LAST
+                ON CONFLICT DO NOTHING
+                """
+            )
+        )
+        return result.rowcount
+
+    async def merge_order_items(self) -> int:
+        """
+        Повторная загрузка тех же позиций не увеличивает количество.
+
+        Итоги заказов (total_sum, item_count) и суммы клиентов (customertotal)
+        увеличиваются только на вставленные позиции, в том же запросе.
+        """
+        result = await self.session.execute(
+            text(
+                f"""
+                WITH inserted AS (
+                    INSERT INTO orderitem
+                        (order_id, created_at, nomenclature_id, amount, price)
+                    SELECT order_id, created_at, nomenclature_id,
+                           SUM(amount), MAX(price)
+                    FROM {self.staging_table}
+                    WHERE nomenclature_id IS NOT NULL
+                    GROUP BY order_id, created_at, nomenclature_id
+                    ON CONFLICT (order_id, nomenclature_id, created_at) DO NOTHING
+                    RETURNING order_id, created_at, amount, price
+                ), orders AS (
+                    UPDATE "order" o
+                    SET total_sum = o.total_sum + s.delta,
+                        item_count = o.item_count + s.lines
+                    FROM (
+                        SELECT order_id, created_at,
+                               SUM(amount * price) AS delta, count(*) AS lines
+                        FROM inserted
+                        GROUP BY order_id, created_at
+                    ) s
+                    WHERE o.id = s.order_id AND o.created_at = s.created_at
+                ), totals AS (
+                    INSERT INTO customertotal (customer_id, total_sum)
+                    SELECT o.customer_id, SUM(i.amount * i.price)
+                    FROM inserted i
+                    JOIN "order" o ON o.id = i.order_id AND o.created_at = i.created_at
+                    WHERE o.customer_id IS NOT NULL
+                    GROUP BY o.customer_id
+                    ORDER BY o.customer_id
+                    ON CONFLICT (customer_id) DO UPDATE
+                    SET total_sum = customertotal.total_sum + EXCLUDED.total_sum
+                )
+                SELECT count(*) FROM inserted
+                """
+            )
+        )
+        return result.scalar_one()
+
+    async def clear_staging(self) -> None:
+        await self.session.execute(text(f"TRUNCATE {self.staging_table}"))
+
+    async def drop_staging(self) -> None:
+        await self.session.execute(text(f"DROP TABLE IF EXISTS {self.staging_table}"))
@@ -1,7 +1,360 @@
+from typing import Sequence
+
+from sqlalchemy import (
+    Integer,
+    Row,
+    Select,
+    Update,
+    bindparam,
+    column,
+    delete,
+    func,
+    null,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
 from src.crud.base import DBBase, ModelType
-from src.models.models import Nomenclature
+from src.db.statements import statement_cache
+from src.models.models import Nomenclature, NomenclatureStock, ProductCategory
 
 
 class ProductCRUD(DBBase):
-    def __init__(self, model: type[ModelType] = Nomenclature) -> None:
-        super().__init__(model=model)
+    bucket_wait_attempts = 3
+
+    def __init__(
+        self,
+        model: type[ModelType] = Nomenclature,
+        session: AsyncSession | AsyncConnection | None = None,
+    ) -> None:
+        super().__init__(model=model, session=session)
+
+    @staticmethod
+    def _catalog_product_stmt() -> Select:
+        return (
+            select(
+                Nomenclature.id,
+                Nomenclature.name,
+                Nomenclature.price,
+                func.array_remove(
+                    func.array_agg(ProductCategory.category_id), null()
+                ).label("category_ids"),
+            )
+            .outerjoin(
+                ProductCategory, ProductCategory.nomenclature_id == Nomenclature.id
+            )
+            .where(Nomenclature.id == bindparam("nomenclature_id", type_=Integer))
+            .group_by(Nomenclature.id)
+        )
+
+    async def get_catalog_product(self, nomenclature_id: int) -> Row | None:
+        """Атрибуты товара для каталога: id, название, цена и id категорий."""
+        stmt = statement_cache.get("product.catalog", self._catalog_product_stmt)
+        return (
+            await self.session.execute(stmt, {"nomenclature_id": nomenclature_id})
+        ).one_or_none()
+
+    @staticmethod
+    def _reserve_stmt() -> Select:
+        nomenclature_id = bindparam("nomenclature_id", type_=Integer)
+        amount = bindparam("amount", type_=Integer)
+        product = (
+            select(
+                Nomenclature.id,
+                Nomenclature.amount,
+                Nomenclature.price,
+                Nomenclature.stock_buckets,
+            )
+            .where(Nomenclature.id == nomenclature_id)
+            .cte("product")
+        )
+        reserved = (
+            update(Nomenclature)
+            .where(
+                Nomenclature.id == nomenclature_id,
+                Nomenclature.stock_buckets == 0,
+                Nomenclature.amount >= amount,
+            )
+            .values(amount=Nomenclature.amount - amount)
+            .returning(Nomenclature.amount, Nomenclature.price)
+            .cte("reserved")
+        )
+        return select(
+            product.c.id,
+            product.c.amount.label("available"),
+            reserved.c.amount.label("remaining"),
+            func.coalesce(reserved.c.price, product.c.price).label("price"),
+            product.c.stock_buckets,
+        ).select_from(product.outerjoin(reserved, true()))
+
+    async def reserve(self, nomenclature_id: int, amount: int) -> Row | None:
+        """
+        Резервирование товара одним запросом.
+
+        Остаток уменьшается только если его достаточно. Возвращает строку
+        (id, available, remaining, price, stock_buckets): remaining равен None,
+        если товара недостаточно или его остаток разбит на корзины
+        (stock_buckets > 0, см. reserve_sharded); None вместо строки,
+        если товар не найден.
+        """
+        stmt = statement_cache.get("product.reserve", self._reserve_stmt)
+        return (
+            await self.session.execute(
+                stmt, {"nomenclature_id": nomenclature_id, "amount": amount}
+            )
+        ).one_or_none()
+
+    @staticmethod
+    def _stock_stmt() -> Select:
+        buckets = (
+            select(func.coalesce(func.sum(NomenclatureStock.amount), 0))
+            .where(NomenclatureStock.nomenclature_id == Nomenclature.id)
+            .scalar_subquery()
+        )
+        return select(Nomenclature.amount + buckets).where(
+            Nomenclature.id == bindparam("nomenclature_id", type_=Integer)
+        )
+
+    async def get_stock(self, nomenclature_id: int) -> int | None:
+        """Общий остаток товара с учётом корзин (как nomenclature_stock)."""
+        stmt = statement_cache.get("product.stock", self._stock_stmt)
+        return await self.session.scalar(stmt, {"nomenclature_id": nomenclature_id})
+
+    @staticmethod
+    def _bucket_stmt(skip_locked: bool = True) -> Update:
+        amount = bindparam("amount", type_=Integer)
+        bucket = (
+            select(NomenclatureStock.nomenclature_id, NomenclatureStock.bucket)
+            .where(
+                NomenclatureStock.nomenclature_id
+                == bindparam("nomenclature_id", type_=Integer),
+                NomenclatureStock.amount >= amount,
+            )
+            .order_by(func.random())
+            .limit(1)
+            .with_for_update(skip_locked=skip_locked)
+            .cte("bucket")
+        )
+        return (
+            update(NomenclatureStock)
+            .where(
+                NomenclatureStock.nomenclature_id == bucket.c.nomenclature_id,
+                NomenclatureStock.bucket == bucket.c.bucket,
+            )
+            .values(amount=NomenclatureStock.amount - amount)
+            .returning(NomenclatureStock.bucket)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def reserve_from_bucket(
+        self, nomenclature_id: int, amount: int, wait: bool = False
+    ) -> bool:
+        """
+        Списание из одной случайной корзины, в которой хватает остатка.
+
+        Корзины, заблокированные другими транзакциями, пропускаются
+        (SKIP LOCKED), поэтому параллельные заказы не ждут друг друга.
+        При wait=True запрос ждёт блокировку выбранной корзины; если после
+        ожидания в ней не хватает остатка, возвращается False.
+        """
+        if wait:
+            stmt = statement_cache.get(
+                "product.reserve_from_bucket_wait",
+                lambda: self._bucket_stmt(skip_locked=False),
+            )
+        else:
+            stmt = statement_cache.get(
+                "product.reserve_from_bucket", self._bucket_stmt
+            )
+        result = await self.session.execute(
+            stmt, {"nomenclature_id": nomenclature_id, "amount": amount}
+        )
+        return result.one_or_none() is not None
+
+    async def redistribute_stock(
+        self,
+        nomenclature_id: int,
+        buckets: int | None = None,
+        reserve: int = 0,
+    ) -> int | None:
+        """
+        Перераспределение остатка товара по корзинам.
+
+        Блокирует строку товара и все его корзины, собирает общий остаток,
+        списывает reserve (если хватает) и раскладывает оставшееся поровну
+        по buckets корзинам (по умолчанию — текущее число корзин).
+        При buckets=0 весь остаток возвращается в Nomenclature.amount.
+        Возвращает общий остаток до списания или None, если товар не найден.
+        """
+        product = (
+            await self.session.execute(
+                select(Nomenclature.amount, Nomenclature.stock_buckets)
+                .where(Nomenclature.id == nomenclature_id)
+                .with_for_update()
+            )
+        ).one_or_none()
+        if not product:
+            return None
+        sharded = await self.session.scalars(
+            select(NomenclatureStock.amount)
+            .where(NomenclatureStock.nomenclature_id == nomenclature_id)
+            .order_by(NomenclatureStock.bucket)
+            .with_for_update()
+        )
+        total = product.amount + sum(sharded.all())
+        if total < reserve:
+            return total
+        buckets = product.stock_buckets if buckets is None else buckets
+        remaining = total - reserve
+        await self.session.execute(
+            delete(NomenclatureStock)
+            .where(
+                NomenclatureStock.nomenclature_id == nomenclature_id,
+                NomenclatureStock.bucket >= buckets,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if buckets:
+            stmt = insert(NomenclatureStock).values(
+                [
+                    {
+                        "nomenclature_id": nomenclature_id,
+                        "bucket": bucket,
+                        "amount": remaining // buckets
+                        + (1 if bucket < remaining % buckets else 0),
+                    }
+                    for bucket in range(buckets)
+                ]
+            )
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[
+                        NomenclatureStock.nomenclature_id,
+                        NomenclatureStock.bucket,
+                    ],
+                    set_={"amount": stmt.excluded.amount},
+                )
+            )
+        await self.session.execute(
+            update(Nomenclature)
+            .where(Nomenclature.id == nomenclature_id)
+            .values(amount=0 if buckets else remaining, stock_buckets=buckets)
+            .execution_options(synchronize_session=False)
+        )
+        return total
+
+    @staticmethod
+    def _bucket_stock_stmt() -> Select:
+        nomenclature_id = bindparam("nomenclature_id", type_=Integer)
+        buckets = (
+            select(
+                func.coalesce(func.sum(NomenclatureStock.amount), 0).label("sharded"),
+                func.coalesce(func.max(NomenclatureStock.amount), 0).label(
+                    "max_bucket"
+                ),
+            )
+            .where(NomenclatureStock.nomenclature_id == nomenclature_id)
+            .subquery("buckets")
+        )
+        return select(
+            (Nomenclature.amount + buckets.c.sharded).label("total"),
+            buckets.c.max_bucket,
+        ).where(Nomenclature.id == nomenclature_id)
+
+    async def get_bucket_stock(self, nomenclature_id: int) -> Row | None:
+        """Общий остаток и наибольший остаток корзины, без блокировок."""
+        stmt = statement_cache.get("product.bucket_stock", self._bucket_stock_stmt)
+        return (
+            await self.session.execute(stmt, {"nomenclature_id": nomenclature_id})
+        ).one_or_none()
+
+    async def reserve_sharded(self, nomenclature_id: int, amount: int) -> int | None:
+        """
+        Списание остатка товара, разбитого на корзины.
+
+        Сначала из любой свободной корзины без ожидания блокировок. Если
+        свободной подходящей нет, остаток корзин читается без блокировок:
+        при нехватке общего остатка списание сразу отклоняется, если
+        в какой-то корзине остатка хватает — запрос ждёт блокировку корзины
+        (до bucket_wait_attempts попыток). Перераспределение всех корзин
+        под блокировкой товара выполняется, только когда общего остатка
+        хватает, а в отдельных корзинах — нет. Возвращает None при успешном
+        списании, иначе известный общий остаток.
+        """
+        if await self.reserve_from_bucket(nomenclature_id, amount):
+            return None
+        for _ in range(self.bucket_wait_attempts):
+            stock = await self.get_bucket_stock(nomenclature_id)
+            if stock is None:
+                return 0
+            if stock.total < amount:
+                return stock.total
+            if stock.max_bucket < amount:
+                break
+            if await self.reserve_from_bucket(nomenclature_id, amount, wait=True):
+                return None
+        total = await self.redistribute_stock(nomenclature_id, reserve=amount)
+        if total is not None and total >= amount:
+            return None
+        return total or 0
+
+    @staticmethod
+    def _many_stmt() -> Select:
+        return (
+            select(
+                Nomenclature.id,
+                Nomenclature.amount,
+                Nomenclature.price,
+                Nomenclature.stock_buckets,
+            )
+            .where(Nomenclature.id.in_(bindparam("nomenclature_ids", expanding=True)))
+            .order_by(Nomenclature.id)
+        )
+
+    @classmethod
+    def _lock_many_stmt(cls) -> Select:
+        return (
+            cls._many_stmt()
+            .where(Nomenclature.stock_buckets == 0)
+            .with_for_update(key_share=True)
+        )
+
+    async def lock_many(self, nomenclature_ids: list[int]) -> Sequence[Row]:
+        """
+        Блокировка строк товаров в порядке id (без взаимных блокировок).
+
+        FOR NO KEY UPDATE не конфликтует с FOR KEY SHARE, которую берут
+        вставки orderitem по внешнему ключу на товар. Товары с корзинами
+        остатка не блокируются и не возвращаются: их остаток списывается
+        через reserve_sharded, а строку товара читает get_many.
+        """
+        stmt = statement_cache.get("product.lock_many", self._lock_many_stmt)
+        return (
+            await self.session.execute(stmt, {"nomenclature_ids": nomenclature_ids})
+        ).all()
+
+    async def get_many(self, nomenclature_ids: list[int]) -> Sequence[Row]:
+        """Строки товаров без блокировок, в порядке id."""
+        stmt = statement_cache.get("product.get_many", self._many_stmt)
+        return (
+            await self.session.execute(stmt, {"nomenclature_ids": nomenclature_ids})
+        ).all()
+
+    async def decrement_many(self, amounts: dict[int, int]) -> None:
+        """Списание остатков нескольких товаров одним запросом."""
+        if not amounts:
+            return
+        lines = values(
+            column("nomenclature_id", Integer), column("amount", Integer), name="lines"
+        ).data(list(amounts.items()))
+        stmt = (
+            update(Nomenclature)
+            .where(Nomenclature.id == lines.c.nomenclature_id)
+            .values(amount=Nomenclature.amount - lines.c.amount)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
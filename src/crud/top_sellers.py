@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from sqlalchemy import Row, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.base import DBBase, ModelType
+from src.models.models import MatviewRefresh
+
+
+class TopSellersCRUD(DBBase):
+    """Материализованное представление top_5_month_sellers и время его обновления."""
+
+    view_name = "top_5_month_sellers"
+
+    def __init__(
+        self,
+        model: type[ModelType] = MatviewRefresh,
+        session: AsyncSession | None = None,
+    ) -> None:
+        super().__init__(model=model, session=session)
+
+    async def try_lock(self) -> bool:
+        """Advisory-блокировка до конца транзакции: обновляет только её владелец."""
+        return await self.session.scalar(
+            select(func.pg_try_advisory_xact_lock(func.hashtext(self.view_name)))
+        )
+
+    async def is_stale(self, max_age: float) -> bool:
+        """Представление не обновлялось дольше max_age секунд."""
+        fresh = await self.session.scalar(
+            select(MatviewRefresh.name).where(
+                MatviewRefresh.name == self.view_name,
+                MatviewRefresh.refreshed_at
+                > func.clock_timestamp() - func.make_interval(0, 0, 0, 0, 0, 0, max_age),
+            )
+        )
+        return fresh is None
+
+    async def refresh(self) -> None:
+        """Обновление без блокировки чтения (нужен уникальный индекс)."""
+        await self.session.execute(
+            text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self.view_name}")
+        )
+        stmt = insert(MatviewRefresh).values(
+            name=self.view_name, refreshed_at=func.clock_timestamp()
+        )
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[MatviewRefresh.name],
+                set_={"refreshed_at": stmt.excluded.refreshed_at},
+            )
+        )
+
+    async def get_refreshed_at(self) -> datetime | None:
+        return await self.session.scalar(
+            select(MatviewRefresh.refreshed_at).where(
+                MatviewRefresh.name == self.view_name
+            )
+        )
+
+    async def get_rows(self) -> list[Row]:
+        query = await self.session.execute(
+            text(
+                f"""
+                SELECT nomenclature_id, name, category_name, total_amount
+                FROM {self.view_name}
+                ORDER BY total_amount DESC, nomenclature_id
+                """
+            )
+        )
+        return query.all()
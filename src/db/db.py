@@ -1,7 +1,8 @@
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable
 
-from sqlalchemy import DateTime, func
+import asyncpg
+from sqlalchemy import DateTime, func, inspect
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -13,6 +14,8 @@ from sqlalchemy.orm import (
 from sqlalchemy.pool import NullPool
 
 from src.core.config import settings
+from src.db.pool import MeteredAsyncQueuePool, register_pool_metrics
+from src.db.statements import register_statement_metrics
 
 
 class Base(DeclarativeBase):
@@ -30,8 +33,16 @@ class Base(DeclarativeBase):
     def to_dict(self) -> dict:
         """
         Преобразование модели в словарь.
+
+        Только загруженные столбцы модели, без _sa_instance_state
+        и без обращения к БД за невыгруженными атрибутами.
         """
-        return self.__dict__
+        state = inspect(self)
+        return {
+            attr.key: state.dict[attr.key]
+            for attr in state.mapper.column_attrs
+            if attr.key in state.dict
+        }
 
     def __repr__(self) -> str:
         """
@@ -64,5 +75,58 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-engine = create_async_engine(settings.database_url, poolclass=NullPool)
-async_session = sessionmaker(engine, class_=AsyncSession)
+async def listen(channel: str, callback: Callable) -> asyncpg.Connection:
+    """
+    Подписка на NOTIFY channel на отдельном соединении asyncpg.
+
+    Соединение открывается вне пула engine и держится до close():
+    постоянный LISTEN не уменьшает число соединений пула для запросов.
+    """
+    url = engine.url.set(drivername="postgresql")
+    connection = await asyncpg.connect(url.render_as_string(hide_password=False))
+    await connection.add_listener(channel, callback)
+    return connection
+
+
+def build_engine():
+    """
+    Создание движка БД.
+
+    При db_pool_enabled соединения переиспользуются через пул,
+    иначе каждая сессия открывает новое соединение (NullPool).
+    db_partitionwise включает соединение и агрегацию по партициям
+    для совместно партиционированных "order" и orderitem.
+    db_compiled_cache_size — размер кэша скомпилированных выражений
+    SQLAlchemy, db_statement_cache_size — кэша подготовленных запросов
+    asyncpg на каждом соединении.
+    """
+    connect_args = {"prepared_statement_cache_size": settings.db_statement_cache_size}
+    if settings.db_partitionwise:
+        connect_args["server_settings"] = {
+            "enable_partitionwise_join": "on",
+            "enable_partitionwise_aggregate": "on",
+        }
+    if not settings.db_pool_enabled:
+        return create_async_engine(
+            settings.database_url,
+            poolclass=NullPool,
+            query_cache_size=settings.db_compiled_cache_size,
+            connect_args=connect_args,
+        )
+    return create_async_engine(
+        settings.database_url,
+        poolclass=MeteredAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        query_cache_size=settings.db_compiled_cache_size,
+        connect_args=connect_args,
+    )
+
+
+engine = build_engine()
+register_pool_metrics(engine)
+register_statement_metrics(engine)
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -0,0 +1,47 @@
+"""
+Общие функции миграций для месячных партиций.
+
+Миграции не используют src.db.partition: код приложения меняется вместе
+со схемой, а уже написанные миграции должны выполняться так же, как при
+создании.
+"""
+
+import re
+from datetime import date
+
+import sqlalchemy as sa
+from alembic import op
+
+ORDER_PARTITION_RE = re.compile(r"^order_(\d{4})_(\d{2})$")
+
+
+def next_month(value: date) -> date:
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+def order_months() -> list[date]:
+    """Месяцы существующих партиций "order" вида order_YYYY_MM."""
+    names = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = 'order'
+                """
+            )
+        )
+        .scalars()
+        .all()
+    )
+    months = []
+    for name in names:
+        match = ORDER_PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
@@ -0,0 +1,77 @@
+"""Add stock shards
+
+Revision ID: 3f9a2c7d41b8
+Revises: 6dc844573d3e
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a2c7d41b8"
+down_revision: Union[str, Sequence[str], None] = "6dc844573d3e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "nomenclature",
+        sa.Column(
+            "stock_buckets",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+            comment="Число корзин остатка (0 — остаток хранится в amount)",
+        ),
+    )
+    op.create_table(
+        "nomenclaturestock",
+        sa.Column("nomenclature_id", sa.Integer(), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False, comment="Номер корзины"),
+        sa.Column("amount", sa.Integer(), nullable=False, comment="Количество"),
+        sa.CheckConstraint(
+            "amount >= 0", name="chk_nomenclature_stock_amount_non_negative"
+        ),
+        sa.ForeignKeyConstraint(
+            ["nomenclature_id"], ["nomenclature.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("nomenclature_id", "bucket"),
+    )
+    op.execute(
+        """
+        CREATE VIEW nomenclature_stock AS
+        SELECT n.id AS nomenclature_id,
+               n.amount + COALESCE(s.amount, 0) AS amount
+        FROM nomenclature n
+        LEFT JOIN (
+            SELECT nomenclature_id, SUM(amount) AS amount
+            FROM nomenclaturestock
+            GROUP BY nomenclature_id
+        ) s ON s.nomenclature_id = n.id;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        UPDATE nomenclature n
+        SET amount = n.amount + s.amount, stock_buckets = 0
+        FROM (
+            SELECT nomenclature_id, SUM(amount) AS amount
+            FROM nomenclaturestock
+            GROUP BY nomenclature_id
+        ) s
+        WHERE s.nomenclature_id = n.id;
+        """
+    )
+    op.execute("DROP VIEW IF EXISTS nomenclature_stock;")
+    op.drop_table("nomenclaturestock")
+    op.drop_column("nomenclature", "stock_buckets")
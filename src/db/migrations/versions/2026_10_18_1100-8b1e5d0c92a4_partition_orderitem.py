@@ -0,0 +1,205 @@
+"""Partition orderitem by month together with order
+
+Revision ID: 8b1e5d0c92a4
+Revises: 3f9a2c7d41b8
+Create Date: 2026-10-18 11:00:00.000000
+
+Переход выполняется без долгой блокировки orderitem:
+
+1. Создаётся партиционированная orderitem_partitioned с партициями
+   orderitem_YYYY_MM на каждый месяц существующих партиций "order".
+2. Триггер на старой orderitem повторяет в новой таблице все изменения.
+3. Данные переносятся по месяцам, каждый месяц в своей транзакции,
+   затем так же по месяцам удаляются строки, удалённые во время переноса.
+4. Под короткой блокировкой без чтения данных таблицы меняются местами.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.db.migrations.partitions import next_month, order_months
+
+# revision identifiers, used by Alembic.
+revision: str = "8b1e5d0c92a4"
+down_revision: Union[str, Sequence[str], None] = "3f9a2c7d41b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    months = order_months()
+
+    # === 1) Новая партиционированная таблица ===
+    op.execute(
+        """
+        CREATE TABLE orderitem_partitioned (
+            order_id integer NOT NULL,
+            created_at timestamptz NOT NULL,
+            nomenclature_id integer NOT NULL,
+            amount integer NOT NULL,
+            price numeric NOT NULL,
+            CONSTRAINT orderitem_partitioned_pkey
+                PRIMARY KEY (order_id, nomenclature_id, created_at),
+            CONSTRAINT chk_order_item_amount_positive CHECK (amount > 0),
+            CONSTRAINT chk_order_item_price_non_negative CHECK (price >= 0),
+            CONSTRAINT orderitem_partitioned_nomenclature_id_fkey
+                FOREIGN KEY (nomenclature_id)
+                REFERENCES nomenclature (id) ON DELETE CASCADE,
+            CONSTRAINT orderitem_partitioned_order_id_created_at_fkey
+                FOREIGN KEY (order_id, created_at)
+                REFERENCES "order" (id, created_at) ON DELETE CASCADE
+        ) PARTITION BY RANGE (created_at);
+        """
+    )
+    op.execute("COMMENT ON COLUMN orderitem_partitioned.amount IS 'Количество';")
+    op.execute("COMMENT ON COLUMN orderitem_partitioned.price IS 'Цена';")
+    op.execute(
+        "CREATE INDEX idx_oi_nomenclature_p ON orderitem_partitioned (nomenclature_id);"
+    )
+    op.execute(
+        "CREATE INDEX idx_oi_order_created_at_p "
+        "ON orderitem_partitioned (order_id, created_at);"
+    )
+    for month in months:
+        op.execute(
+            f"""
+            CREATE TABLE orderitem_{month.year}_{month.month:02d}
+            PARTITION OF orderitem_partitioned
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}');
+            """
+        )
+
+    # === 2) Зеркалирование изменений старой таблицы ===
+    op.execute(
+        """
+        CREATE FUNCTION orderitem_mirror() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM orderitem_partitioned
+                WHERE order_id = OLD.order_id
+                  AND nomenclature_id = OLD.nomenclature_id
+                  AND created_at = OLD.created_at;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO orderitem_partitioned
+                    (order_id, created_at, nomenclature_id, amount, price)
+                VALUES
+                    (NEW.order_id, NEW.created_at, NEW.nomenclature_id,
+                     NEW.amount, NEW.price)
+                ON CONFLICT (order_id, nomenclature_id, created_at)
+                DO UPDATE SET amount = EXCLUDED.amount, price = EXCLUDED.price;
+            END IF;
+            RETURN NULL;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER orderitem_mirror
+        AFTER INSERT OR UPDATE OR DELETE ON orderitem
+        FOR EACH ROW EXECUTE FUNCTION orderitem_mirror();
+        """
+    )
+
+    # === 3) Перенос данных по месяцам, каждый месяц отдельной транзакцией ===
+    with op.get_context().autocommit_block():
+        for month in months:
+            op.execute(
+                f"""
+                INSERT INTO orderitem_partitioned
+                    (order_id, created_at, nomenclature_id, amount, price)
+                SELECT order_id, created_at, nomenclature_id, amount, price
+                FROM orderitem
+                WHERE created_at >= '{month.isoformat()}'
+                  AND created_at < '{next_month(month).isoformat()}'
+                ON CONFLICT DO NOTHING;
+                """
+            )
+        # Перенос читает снимок orderitem: строка, удалённая после его начала,
+        # могла попасть в новую таблицу уже после того, как триггер удалил
+        # её копию. Такие строки удаляются здесь, до блокировки; удаления
+        # после этой проверки повторяет триггер.
+        for month in months:
+            op.execute(
+                f"""
+                DELETE FROM orderitem_partitioned p
+                WHERE p.created_at >= '{month.isoformat()}'
+                  AND p.created_at < '{next_month(month).isoformat()}'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM orderitem o
+                      WHERE o.order_id = p.order_id
+                        AND o.nomenclature_id = p.nomenclature_id
+                        AND o.created_at = p.created_at
+                  );
+                """
+            )
+
+    # === 4) Переключение под короткой блокировкой: только DDL ===
+    op.execute("LOCK TABLE orderitem IN ACCESS EXCLUSIVE MODE;")
+    op.execute("DROP TRIGGER orderitem_mirror ON orderitem;")
+    op.execute("DROP FUNCTION orderitem_mirror();")
+    op.execute("DROP TABLE orderitem;")
+    op.execute("ALTER TABLE orderitem_partitioned RENAME TO orderitem;")
+    op.execute("ALTER INDEX orderitem_partitioned_pkey RENAME TO orderitem_pkey;")
+    op.execute("ALTER INDEX idx_oi_nomenclature_p RENAME TO idx_oi_nomenclature;")
+    op.execute(
+        "ALTER INDEX idx_oi_order_created_at_p RENAME TO idx_oi_order_created_at;"
+    )
+    op.execute(
+        "ALTER TABLE orderitem RENAME CONSTRAINT "
+        "orderitem_partitioned_nomenclature_id_fkey TO orderitem_nomenclature_id_fkey;"
+    )
+    op.execute(
+        "ALTER TABLE orderitem RENAME CONSTRAINT "
+        "orderitem_partitioned_order_id_created_at_fkey "
+        "TO orderitem_order_id_created_at_fkey;"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE orderitem RENAME TO orderitem_partitioned;")
+    op.execute(
+        "ALTER INDEX orderitem_pkey RENAME TO orderitem_partitioned_pkey;"
+    )
+    op.execute("DROP INDEX idx_oi_nomenclature;")
+    op.execute("DROP INDEX idx_oi_order_created_at;")
+    op.create_table(
+        "orderitem",
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("nomenclature_id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False, comment="Количество"),
+        sa.Column("price", sa.Numeric(), nullable=False, comment="Цена"),
+        sa.CheckConstraint("amount > 0", name="chk_order_item_amount_positive"),
+        sa.CheckConstraint("price >= 0", name="chk_order_item_price_non_negative"),
+        sa.ForeignKeyConstraint(
+            ["nomenclature_id"], ["nomenclature.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["order_id", "created_at"],
+            ["order.id", "order.created_at"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("order_id", "nomenclature_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO orderitem (order_id, created_at, nomenclature_id, amount, price)
+        SELECT order_id, created_at, nomenclature_id, amount, price
+        FROM orderitem_partitioned;
+        """
+    )
+    op.execute("DROP TABLE orderitem_partitioned;")
+    op.create_index(
+        "idx_oi_nomenclature", "orderitem", ["nomenclature_id"], unique=False
+    )
+    op.create_index(
+        "idx_oi_order_created_at", "orderitem", ["order_id", "created_at"], unique=False
+    )
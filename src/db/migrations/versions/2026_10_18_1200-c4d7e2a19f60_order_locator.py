@@ -0,0 +1,87 @@
+"""Order locator: order id -> partition key
+
+Revision ID: c4d7e2a19f60
+Revises: 8b1e5d0c92a4
+Create Date: 2026-10-18 12:00:00.000000
+
+Первичный ключ "order" — (id, created_at), поэтому поиск заказа только по id
+обходит индексы всех месячных партиций. Таблица orderlocator хранит
+created_at каждого заказа и заполняется триггером на "order": запрос
+сначала читает одну строку orderlocator, затем одну партицию "order".
+
+Первичный ключ orderlocator делает id заказа уникальным: заказ с уже
+существующим id и другим created_at отклоняется (unique_violation), а не
+перенаправляет orderlocator на новую строку. Миграция не применится, если
+в "order" уже есть повторяющиеся id.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d7e2a19f60"
+down_revision: Union[str, Sequence[str], None] = "8b1e5d0c92a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "orderlocator",
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            comment="Дата создания заказа",
+        ),
+        sa.PrimaryKeyConstraint("order_id"),
+    )
+    op.execute(
+        """
+        CREATE FUNCTION order_locator_sync() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM orderlocator
+                WHERE order_id = OLD.id AND created_at = OLD.created_at;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO orderlocator (order_id, created_at)
+                VALUES (NEW.id, NEW.created_at)
+                ON CONFLICT (order_id) DO NOTHING;
+                IF NOT FOUND THEN
+                    RAISE EXCEPTION 'заказ % уже существует', NEW.id
+                        USING ERRCODE = 'unique_violation',
+                              CONSTRAINT = 'orderlocator_pkey';
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER order_locator_sync
+        AFTER INSERT OR DELETE OR UPDATE OF id, created_at ON "order"
+        FOR EACH ROW EXECUTE FUNCTION order_locator_sync();
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO orderlocator (order_id, created_at)
+        SELECT id, created_at FROM "order";
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER order_locator_sync ON "order";')
+    op.execute("DROP FUNCTION order_locator_sync();")
+    op.drop_table("orderlocator")
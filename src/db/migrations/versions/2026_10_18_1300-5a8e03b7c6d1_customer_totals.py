@@ -0,0 +1,60 @@
+"""Customer running totals
+
+Revision ID: 5a8e03b7c6d1
+Revises: c4d7e2a19f60
+Create Date: 2026-10-18 13:00:00.000000
+
+Сумма заказанных товаров по каждому клиенту хранится в customertotal
+и обновляется приложением вместе с позициями заказов.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a8e03b7c6d1"
+down_revision: Union[str, Sequence[str], None] = "c4d7e2a19f60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "customertotal",
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "total_sum",
+            sa.Numeric(),
+            server_default="0",
+            nullable=False,
+            comment="Сумма заказанных товаров",
+        ),
+        sa.ForeignKeyConstraint(["customer_id"], ["customer.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("customer_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO customertotal (customer_id, total_sum)
+        SELECT c.id, COALESCE(s.total_sum, 0)
+        FROM customer c
+        LEFT JOIN (
+            SELECT o.customer_id, SUM(oi.amount * oi.price) AS total_sum
+            FROM "order" o
+            JOIN orderitem oi ON oi.order_id = o.id AND oi.created_at = o.created_at
+            GROUP BY o.customer_id
+        ) s ON s.customer_id = c.id;
+        """
+    )
+    op.create_index(
+        "idx_customertotal_total_sum", "customertotal", ["total_sum"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_customertotal_total_sum", table_name="customertotal")
+    op.drop_table("customertotal")
@@ -0,0 +1,76 @@
+"""Denormalized order totals
+
+Revision ID: e91b6f4d2a37
+Revises: 5a8e03b7c6d1
+Create Date: 2026-10-18 14:00:00.000000
+
+"order".total_sum и "order".item_count хранят сумму и количество позиций
+заказа. Столбцы с постоянным значением по умолчанию добавляются без
+перезаписи таблицы, заполнение выполняется по месяцам, каждый месяц
+в своей транзакции.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.db.migrations.partitions import next_month, order_months
+
+# revision identifiers, used by Alembic.
+revision: str = "e91b6f4d2a37"
+down_revision: Union[str, Sequence[str], None] = "5a8e03b7c6d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "order",
+        sa.Column(
+            "total_sum",
+            sa.Numeric(),
+            server_default="0",
+            nullable=False,
+            comment="Сумма позиций заказа (SUM(amount * price))",
+        ),
+    )
+    op.add_column(
+        "order",
+        sa.Column(
+            "item_count",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+            comment="Количество позиций заказа",
+        ),
+    )
+    months = order_months()
+    with op.get_context().autocommit_block():
+        for month in months:
+            op.execute(
+                f"""
+                UPDATE "order" o
+                SET total_sum = s.total_sum, item_count = s.item_count
+                FROM (
+                    SELECT order_id, created_at,
+                           SUM(amount * price) AS total_sum, count(*) AS item_count
+                    FROM orderitem
+                    WHERE created_at >= '{month.isoformat()}'
+                      AND created_at < '{next_month(month).isoformat()}'
+                    GROUP BY order_id, created_at
+                ) s
+                WHERE o.id = s.order_id
+                  AND o.created_at = s.created_at
+                  AND o.created_at >= '{month.isoformat()}'
+                  AND o.created_at < '{next_month(month).isoformat()}';
+                """
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("order", "item_count")
+    op.drop_column("order", "total_sum")
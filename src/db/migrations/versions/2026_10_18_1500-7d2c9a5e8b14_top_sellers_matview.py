@@ -0,0 +1,75 @@
+"""Top sellers materialized view with refresh bookkeeping
+
+Revision ID: 7d2c9a5e8b14
+Revises: e91b6f4d2a37
+Create Date: 2026-10-18 15:00:00.000000
+
+top_5_month_sellers из README создаётся миграцией. Для
+REFRESH MATERIALIZED VIEW CONCURRENTLY нужен уникальный индекс, поэтому
+представление дополнено столбцом nomenclature_id. Время последнего
+обновления хранится в matviewrefresh.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2c9a5e8b14"
+down_revision: Union[str, Sequence[str], None] = "e91b6f4d2a37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "matviewrefresh",
+        sa.Column("name", sa.Text(), nullable=False, comment="Имя представления"),
+        sa.Column(
+            "refreshed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            comment="Время последнего обновления",
+        ),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS top_5_month_sellers;")
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW top_5_month_sellers AS
+        WITH sums AS (
+            SELECT oi.nomenclature_id, SUM(oi.amount) AS total_amount
+            FROM orderitem oi
+            WHERE oi.created_at >= date_trunc('month', now()) - INTERVAL '1 month'
+              AND oi.created_at < date_trunc('month', now())
+            GROUP BY oi.nomenclature_id
+        )
+        SELECT n.id AS nomenclature_id, n.name, top_c.name AS category_name,
+               s.total_amount
+        FROM sums s
+        JOIN nomenclature n ON n.id = s.nomenclature_id
+        JOIN productcategory pc ON pc.nomenclature_id = n.id
+        JOIN category c ON c.id = pc.category_id
+        JOIN category top_c ON subpath(c.path, 0, 1) = top_c.path
+        GROUP BY n.id, n.name, top_c.name, s.total_amount
+        ORDER BY s.total_amount DESC
+        LIMIT 5;
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX uq_top_5_month_sellers "
+        "ON top_5_month_sellers (nomenclature_id, category_name);"
+    )
+    op.execute(
+        "INSERT INTO matviewrefresh (name, refreshed_at) "
+        "VALUES ('top_5_month_sellers', clock_timestamp());"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW top_5_month_sellers;")
+    op.drop_table("matviewrefresh")
@@ -0,0 +1,48 @@
+"""Notify on category changes
+
+Revision ID: 2b6f1e8d4c93
+Revises: 7d2c9a5e8b14
+Create Date: 2026-10-18 16:00:00.000000
+
+После любого изменения category отправляется NOTIFY category_changed:
+процессы приложения перестраивают дерево категорий в памяти.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2b6f1e8d4c93"
+down_revision: Union[str, Sequence[str], None] = "7d2c9a5e8b14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE FUNCTION category_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('category_changed', '');
+            RETURN NULL;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER category_notify
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON category
+        FOR EACH STATEMENT EXECUTE FUNCTION category_notify();
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER category_notify ON category;")
+    op.execute("DROP FUNCTION category_notify();")
@@ -0,0 +1,195 @@
+"""Denormalized top-level category on nomenclature
+
+Revision ID: 9c3a7f2e5d81
+Revises: 2b6f1e8d4c93
+Create Date: 2026-10-18 17:00:00.000000
+
+nomenclature.top_category_id — категория 1 уровня товара. Если товар
+привязан к нескольким категориям, берётся категория 1 уровня для связи
+с наименьшим category_id. Столбец поддерживается триггерами:
+
++ на productcategory — при добавлении, изменении и удалении связи;
++ на category — при изменении path (перенос поддерева).
+
+top_5_month_sellers пересоздаётся без соединения с productcategory
+и ltree: одна строка на товар.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9c3a7f2e5d81"
+down_revision: Union[str, Sequence[str], None] = "2b6f1e8d4c93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "nomenclature",
+        sa.Column(
+            "top_category_id",
+            sa.Integer(),
+            nullable=True,
+            comment="Категория 1 уровня (поддерживается триггерами)",
+        ),
+    )
+    op.create_foreign_key(
+        "nomenclature_top_category_id_fkey",
+        "nomenclature",
+        "category",
+        ["top_category_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.execute(
+        """
+        CREATE FUNCTION nomenclature_top_category(product_id integer)
+        RETURNS integer
+        LANGUAGE sql STABLE AS $$
+            SELECT top_c.id
+            FROM productcategory pc
+            JOIN category c ON c.id = pc.category_id
+            JOIN category top_c ON top_c.path = subpath(c.path, 0, 1)
+            WHERE pc.nomenclature_id = product_id
+            ORDER BY pc.category_id
+            LIMIT 1
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION productcategory_top_category_sync() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE nomenclature
+                SET top_category_id = nomenclature_top_category(id)
+                WHERE id = OLD.nomenclature_id
+                  AND top_category_id IS DISTINCT FROM nomenclature_top_category(id);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE nomenclature
+                SET top_category_id = nomenclature_top_category(id)
+                WHERE id = NEW.nomenclature_id
+                  AND top_category_id IS DISTINCT FROM nomenclature_top_category(id);
+            END IF;
+            RETURN NULL;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER productcategory_top_category_sync
+        AFTER INSERT OR UPDATE OR DELETE ON productcategory
+        FOR EACH ROW EXECUTE FUNCTION productcategory_top_category_sync();
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION category_top_category_sync() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE nomenclature n
+            SET top_category_id = nomenclature_top_category(n.id)
+            WHERE n.id IN (
+                SELECT pc.nomenclature_id
+                FROM productcategory pc
+                JOIN category c ON c.id = pc.category_id
+                WHERE c.path <@ NEW.path
+            )
+              AND n.top_category_id IS DISTINCT FROM nomenclature_top_category(n.id);
+            RETURN NULL;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER category_top_category_sync
+        AFTER UPDATE OF path ON category
+        FOR EACH ROW WHEN (OLD.path IS DISTINCT FROM NEW.path)
+        EXECUTE FUNCTION category_top_category_sync();
+        """
+    )
+    op.execute(
+        "UPDATE nomenclature SET top_category_id = nomenclature_top_category(id);"
+    )
+    op.create_index(
+        "idx_nomenclature_top_category",
+        "nomenclature",
+        ["top_category_id"],
+        unique=False,
+    )
+
+    op.execute("DROP MATERIALIZED VIEW top_5_month_sellers;")
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW top_5_month_sellers AS
+        WITH sums AS (
+            SELECT oi.nomenclature_id, SUM(oi.amount) AS total_amount
+            FROM orderitem oi
+            WHERE oi.created_at >= date_trunc('month', now()) - INTERVAL '1 month'
+              AND oi.created_at < date_trunc('month', now())
+            GROUP BY oi.nomenclature_id
+        )
+        SELECT n.id AS nomenclature_id, n.name, top_c.name AS category_name,
+               s.total_amount
+        FROM sums s
+        JOIN nomenclature n ON n.id = s.nomenclature_id
+        JOIN category top_c ON top_c.id = n.top_category_id
+        ORDER BY s.total_amount DESC
+        LIMIT 5;
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX uq_top_5_month_sellers "
+        "ON top_5_month_sellers (nomenclature_id);"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW top_5_month_sellers;")
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW top_5_month_sellers AS
+        WITH sums AS (
+            SELECT oi.nomenclature_id, SUM(oi.amount) AS total_amount
+            FROM orderitem oi
+            WHERE oi.created_at >= date_trunc('month', now()) - INTERVAL '1 month'
+              AND oi.created_at < date_trunc('month', now())
+            GROUP BY oi.nomenclature_id
+        )
+        SELECT n.id AS nomenclature_id, n.name, top_c.name AS category_name,
+               s.total_amount
+        FROM sums s
+        JOIN nomenclature n ON n.id = s.nomenclature_id
+        JOIN productcategory pc ON pc.nomenclature_id = n.id
+        JOIN category c ON c.id = pc.category_id
+        JOIN category top_c ON subpath(c.path, 0, 1) = top_c.path
+        GROUP BY n.id, n.name, top_c.name, s.total_amount
+        ORDER BY s.total_amount DESC
+        LIMIT 5;
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX uq_top_5_month_sellers "
+        "ON top_5_month_sellers (nomenclature_id, category_name);"
+    )
+    op.drop_index("idx_nomenclature_top_category", table_name="nomenclature")
+    op.execute("DROP TRIGGER category_top_category_sync ON category;")
+    op.execute("DROP FUNCTION category_top_category_sync();")
+    op.execute("DROP TRIGGER productcategory_top_category_sync ON productcategory;")
+    op.execute("DROP FUNCTION productcategory_top_category_sync();")
+    op.execute("DROP FUNCTION nomenclature_top_category(integer);")
+    op.drop_constraint(
+        "nomenclature_top_category_id_fkey", "nomenclature", type_="foreignkey"
+    )
+    op.drop_column("nomenclature", "top_category_id")
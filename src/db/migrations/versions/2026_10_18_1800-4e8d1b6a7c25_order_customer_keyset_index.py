@@ -0,0 +1,75 @@
+"""Keyset index for customer order listing
+
+Revision ID: 4e8d1b6a7c25
+Revises: 9c3a7f2e5d81
+Create Date: 2026-10-18 18:00:00.000000
+
+idx_order_customer (customer_id) заменяется на
+idx_order_customer_created (customer_id, created_at, id): список заказов
+клиента с пагинацией по (created_at, id) читается по индексу без
+сортировки. Индекс создаётся без блокировки записи: на родительской
+таблице (ON ONLY), в каждой партиции CONCURRENTLY, затем партиционные
+индексы присоединяются к родительскому.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4e8d1b6a7c25"
+down_revision: Union[str, Sequence[str], None] = "9c3a7f2e5d81"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _order_partitions() -> list[str]:
+    return list(
+        op.get_bind()
+        .execute(
+            sa.text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = 'order'
+                ORDER BY child.relname
+                """
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = _order_partitions()
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS idx_order_customer_created '
+        'ON ONLY "order" (customer_id, created_at, id);'
+    )
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                f'"{partition}_customer_created_idx" '
+                f'ON "{partition}" (customer_id, created_at, id);'
+            )
+    for partition in partitions:
+        op.execute(
+            f"ALTER INDEX idx_order_customer_created "
+            f'ATTACH PARTITION "{partition}_customer_created_idx";'
+        )
+    op.execute("DROP INDEX IF EXISTS idx_order_customer;")
+    for partition in partitions:
+        op.execute(f'DROP INDEX IF EXISTS "{partition}_idx_order_customer";')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('CREATE INDEX idx_order_customer ON "order" (customer_id);')
+    op.execute("DROP INDEX idx_order_customer_created;")
@@ -0,0 +1,71 @@
+"""Notify on product catalog changes
+
+Revision ID: a6c3e9f1b2d7
+Revises: 4e8d1b6a7c25
+Create Date: 2026-10-18 19:00:00.000000
+
+После изменения названия или цены товара, его удаления или изменения
+его категорий (productcategory) отправляется NOTIFY product_changed
+с id товара: процессы приложения сбрасывают запись каталога в памяти.
+Списание остатка (UPDATE OF amount) уведомлений не отправляет.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a6c3e9f1b2d7"
+down_revision: Union[str, Sequence[str], None] = "4e8d1b6a7c25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE FUNCTION product_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'nomenclature' THEN
+                IF TG_OP = 'DELETE' THEN
+                    PERFORM pg_notify('product_changed', OLD.id::text);
+                ELSE
+                    PERFORM pg_notify('product_changed', NEW.id::text);
+                END IF;
+            ELSE
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM pg_notify('product_changed', OLD.nomenclature_id::text);
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM pg_notify('product_changed', NEW.nomenclature_id::text);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER product_notify
+        AFTER UPDATE OF name, price OR DELETE ON nomenclature
+        FOR EACH ROW EXECUTE FUNCTION product_notify();
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER product_notify
+        AFTER INSERT OR UPDATE OR DELETE ON productcategory
+        FOR EACH ROW EXECUTE FUNCTION product_notify();
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER product_notify ON productcategory;")
+    op.execute("DROP TRIGGER product_notify ON nomenclature;")
+    op.execute("DROP FUNCTION product_notify();")
@@ -0,0 +1,52 @@
+"""Notify on product inserts and restocks
+
+Revision ID: d84b2f0c7e61
+Revises: a6c3e9f1b2d7
+Create Date: 2026-10-18 19:10:00.000000
+
+NOTIFY product_changed отправляется также при добавлении товара и при
+увеличении его остатка (nomenclature.amount или корзины nomenclaturestock):
+процессы приложения сбрасывают отказы кэша NegativeProductCache
+("товар не найден" и "нет в наличии"). Уменьшение остатка при списании
+уведомлений не отправляет.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d84b2f0c7e61"
+down_revision: Union[str, Sequence[str], None] = "a6c3e9f1b2d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("nomenclature", "nomenclaturestock")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER product_notify_insert
+            AFTER INSERT ON {table}
+            FOR EACH ROW EXECUTE FUNCTION product_notify();
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER product_notify_restock
+            AFTER UPDATE OF amount ON {table}
+            FOR EACH ROW WHEN (NEW.amount > OLD.amount)
+            EXECUTE FUNCTION product_notify();
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER product_notify_restock ON {table};")
+        op.execute(f"DROP TRIGGER product_notify_insert ON {table};")
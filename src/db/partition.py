@@ -0,0 +1,177 @@
+import asyncio
+import re
+from datetime import date
+from typing import Iterable
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.core.config import settings
+from src.db.db import engine
+from src.models.models import Order, OrderItem
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(value: date) -> date:
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    """Имя месячной партиции, как в миграции заполнения: order_2026_01."""
+    return f"{table_name}_{month.year}_{month.month:02d}"
+
+
+async def create_month_partition(
+    conn: AsyncConnection, table_name: str, month: date
+) -> str | None:
+    """
+    Создаёт месячную партицию таблицы, если её ещё нет.
+
+    Возвращает имя созданной партиции или None, если она уже была
+    (например, создана другим процессом).
+    """
+    start = month_start(month)
+    name = partition_name(table_name, start)
+    quote = conn.dialect.identifier_preparer.quote
+    if await conn.scalar(text("SELECT to_regclass(:name)"), {"name": quote(name)}):
+        return None
+    await conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {quote(name)} "
+            f"PARTITION OF {quote(table_name)} "
+            f"FOR VALUES FROM ('{start.isoformat()}') "
+            f"TO ('{next_month(start).isoformat()}')"
+        )
+    )
+    return name
+
+
+class PartitionManager:
+    """
+    Фоновое создание месячных партиций.
+
+    При запуске приложения читает существующие партиции из pg_inherits,
+    затем раз в interval секунд создаёт партиции на months_ahead месяцев
+    вперёд. Индексы родительской таблицы (idx_order_customer_created,
+    idx_order_date) PostgreSQL создаёт в новой партиции сам.
+    DDL выполняется вне запросов пользователей, в отдельной транзакции
+    с ограниченным ожиданием блокировки.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        tables: Iterable[str],
+        months_ahead: int,
+        interval: float,
+    ) -> None:
+        self.engine = engine
+        self.tables = tuple(tables)
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self.known: dict[str, set[date]] = {table: set() for table in self.tables}
+        self._task: asyncio.Task | None = None
+
+    async def load(self) -> None:
+        """Чтение существующих партиций вида <table>_YYYY_MM."""
+        async with self.engine.connect() as conn:
+            for table in self.tables:
+                names = await conn.scalars(
+                    text(
+                        """
+                        SELECT child.relname
+                        FROM pg_inherits
+                        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                        WHERE parent.relname = :table
+                        """
+                    ),
+                    {"table": table},
+                )
+                pattern = re.compile(rf"^{re.escape(table)}_(\d{{4}})_(\d{{2}})$")
+                for name in names:
+                    match = pattern.match(name)
+                    if match:
+                        self.known[table].add(
+                            date(int(match.group(1)), int(match.group(2)), 1)
+                        )
+
+    async def ensure(self, months: Iterable[date]) -> list[str]:
+        """
+        Создание недостающих партиций всех таблиц за указанные месяцы.
+
+        Таблицы обрабатываются по порядку, каждая в своей транзакции:
+        партиция "order" появляется раньше партиции orderitem. Возвращает
+        и записывает в журнал только действительно созданные партиции.
+        """
+        months = {month_start(month) for month in months}
+        missing = [
+            (table, month)
+            for table in self.tables
+            for month in sorted(months)
+            if month not in self.known[table]
+        ]
+        if not missing:
+            return []
+        created = []
+        for table in self.tables:
+            table_months = [item for item in missing if item[0] == table]
+            if not table_months:
+                continue
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        f"SET LOCAL lock_timeout = '{settings.partition_lock_timeout}'"
+                    )
+                )
+                for _, month in table_months:
+                    name = await create_month_partition(conn, table, month)
+                    if name:
+                        created.append(name)
+            self.known[table].update(month for _, month in table_months)
+        if created:
+            logger.info(f"Созданы партиции {created}")
+        return created
+
+    def upcoming_months(self, today: date | None = None) -> list[date]:
+        month = month_start(today or date.today())
+        months = [month]
+        for _ in range(self.months_ahead):
+            month = next_month(month)
+            months.append(month)
+        return months
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.ensure(self.upcoming_months())
+            except Exception as err:
+                logger.error(f"Не удалось создать партиции: {err}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        await self.load()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+partition_manager = PartitionManager(
+    engine=engine,
+    tables=[Order.__tablename__, OrderItem.__tablename__],
+    months_ahead=settings.partition_months_ahead,
+    interval=settings.partition_check_interval,
+)
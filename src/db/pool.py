@@ -0,0 +1,107 @@
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, Pool
+
+
+class PoolMetrics:
+    """
+    Счётчики пула соединений с БД.
+
+    Заполняются событиями пула и замерами ожидания свободного соединения
+    в MeteredAsyncQueuePool: waits — число выдач, которым пришлось ждать
+    возврата соединения в исчерпанный пул, а не число всех checkout.
+    """
+
+    def __init__(self) -> None:
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def observe_wait(self, elapsed: float) -> None:
+        self.waits += 1
+        self.wait_time_total += elapsed
+        self.wait_time_max = max(self.wait_time_max, elapsed)
+
+    def snapshot(self, pool: Pool) -> dict:
+        """Текущее состояние пула и накопленные счётчики."""
+        data = {
+            "pool": pool.__class__.__name__,
+            "status": pool.status(),
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "waits": self.waits,
+            "wait_time_total": round(self.wait_time_total, 6),
+            "wait_time_avg": (
+                round(self.wait_time_total / self.waits, 6) if self.waits else 0.0
+            ),
+            "wait_time_max": round(self.wait_time_max, 6),
+            "timeouts": self.timeouts,
+        }
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            data.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool с замером ожидания свободного соединения.
+
+    Ожиданием считается только получение соединения, когда свободных
+    в пуле нет и лимит overflow исчерпан; мгновенные выдачи из очереди
+    и открытие новых соединений в waits не попадают.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        contended = (
+            self._pool.empty()
+            and self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+        )
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            if contended:
+                pool_metrics.observe_wait(perf_counter() - started)
+
+
+def register_pool_metrics(engine: AsyncEngine) -> None:
+    """Подписка счётчиков pool_metrics на события пула движка."""
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_metrics.connects += 1
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_metrics.checkouts += 1
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        pool_metrics.checkins += 1
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.invalidations += 1
@@ -0,0 +1,113 @@
+from typing import Callable, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Executable
+
+
+class StatementMetrics:
+    """
+    Счётчики выполненных запросов.
+
+    compiled_cache_hits / compiled_cache_misses — попадания в кэш
+    скомпилированных выражений SQLAlchemy (context.cache_hit); в рабочем
+    режиме промахов быть не должно. statements и commits — число обращений
+    к БД, по ним считается число round trip на запрос под нагрузкой.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.statements = 0
+        self.compiled_cache_hits = 0
+        self.compiled_cache_misses = 0
+        self.uncached = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    def snapshot(self) -> dict:
+        compiled = self.compiled_cache_hits + self.compiled_cache_misses
+        return {
+            "statements": self.statements,
+            "compiled_cache_hits": self.compiled_cache_hits,
+            "compiled_cache_misses": self.compiled_cache_misses,
+            "compiled_cache_hit_ratio": (
+                round(self.compiled_cache_hits / compiled, 4) if compiled else 0.0
+            ),
+            "uncached": self.uncached,
+            "commits": self.commits,
+            "rollbacks": self.rollbacks,
+            "statement_caches": [
+                cache.stats() for cache in statement_cache_registry.values()
+            ],
+        }
+
+
+statement_metrics = StatementMetrics()
+
+
+def register_statement_metrics(engine: AsyncEngine) -> None:
+    """Подписка statement_metrics на события выполнения запросов движка."""
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statement_metrics.statements += 1
+        if context.cache_hit is CACHE_HIT:
+            statement_metrics.compiled_cache_hits += 1
+        elif context.cache_hit is CACHE_MISS:
+            statement_metrics.compiled_cache_misses += 1
+        else:
+            statement_metrics.uncached += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def on_commit(conn):
+        statement_metrics.commits += 1
+
+    @event.listens_for(engine.sync_engine, "rollback")
+    def on_rollback(conn):
+        statement_metrics.rollbacks += 1
+
+
+statement_cache_registry: dict[str, "StatementCache"] = {}
+
+
+class StatementCache:
+    """
+    Готовые выражения SQLAlchemy по ключу (например, модель и набор полей
+    фильтра). Значения передаются при выполнении через bindparam, поэтому
+    одно выражение переиспользуется: select() не строится заново, ключ кэша
+    компиляции вычисляется один раз, а одинаковый текст SQL позволяет asyncpg
+    повторно использовать подготовленный запрос соединения.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._data: dict[Hashable, Executable] = {}
+        self.hits = 0
+        self.misses = 0
+        statement_cache_registry[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, build: Callable[[], Executable]) -> Executable:
+        stmt = self._data.get(key)
+        if stmt is None:
+            self.misses += 1
+            stmt = self._data[key] = build()
+        else:
+            self.hits += 1
+        return stmt
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+statement_cache = StatementCache("statements")
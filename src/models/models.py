@@ -22,6 +22,18 @@ class Nomenclature(Base, IntegerIdMixin):
     name = mapped_column(Text, comment="Наименование", nullable=False)
     amount = mapped_column(Integer, comment="Количество", default=0, nullable=False)
     price = mapped_column(Numeric, comment="Цена", nullable=False)
+    stock_buckets = mapped_column(
+        Integer,
+        comment="Число корзин остатка (0 — остаток хранится в amount)",
+        default=0,
+        server_default="0",
+        nullable=False,
+    )
+    top_category_id = mapped_column(
+        Integer,
+        ForeignKey("category.id", ondelete="SET NULL"),
+        comment="Категория 1 уровня (поддерживается триггерами)",
+    )
     categories = relationship(
         "ProductCategory", back_populates="nomenclature", cascade="all, delete-orphan"
     )
@@ -31,6 +43,26 @@ class Nomenclature(Base, IntegerIdMixin):
         CheckConstraint("amount >= 0", name="chk_nomenclature_amount_non_negative"),
         Index("idx_nomenclature_name", "name"),
         Index("idx_nomenclature_price", "price"),
+        Index("idx_nomenclature_top_category", "top_category_id"),
+    )
+
+
+class NomenclatureStock(Base):
+    """
+    Корзина остатка товара с высокой конкуренцией за строку остатка.
+
+    Общий остаток такого товара — сумма amount по корзинам плюс
+    Nomenclature.amount (представление nomenclature_stock).
+    """
+
+    nomenclature_id = mapped_column(
+        Integer, ForeignKey("nomenclature.id", ondelete="CASCADE"), primary_key=True
+    )
+    bucket = mapped_column(Integer, comment="Номер корзины", primary_key=True)
+    amount = mapped_column(Integer, comment="Количество", default=0, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("amount >= 0", name="chk_nomenclature_stock_amount_non_negative"),
     )
 
 
@@ -90,20 +122,71 @@ class Customer(Base, IntegerIdMixin):
     __table_args__ = (Index("idx_customer_name", "name"),)
 
 
+class CustomerTotal(Base):
+    """
+    Сумма заказанных товаров клиента (SUM(amount * price) по его заказам).
+
+    Обновляется в той же транзакции, что и позиции заказа;
+    полностью пересчитывается командой src.cli.rebuild_customer_totals.
+    """
+
+    customer_id = mapped_column(
+        Integer, ForeignKey("customer.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_sum = mapped_column(
+        Numeric,
+        comment="Сумма заказанных товаров",
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+
+    __table_args__ = (Index("idx_customertotal_total_sum", "total_sum"),)
+
+
 class Order(Base, IntegerIdMixin):
     customer_id = mapped_column(Integer, ForeignKey("customer.id", ondelete="SET NULL"))
+    total_sum = mapped_column(
+        Numeric,
+        comment="Сумма позиций заказа (SUM(amount * price))",
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+    item_count = mapped_column(
+        Integer,
+        comment="Количество позиций заказа",
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
     customer = relationship("Customer", back_populates="orders")
     order_items = relationship(
         "OrderItem", back_populates="order", cascade="all, delete-orphan"
     )
 
     __table_args__ = (
-        Index("idx_order_customer", "customer_id"),
+        Index("idx_order_customer_created", "customer_id", "created_at", "id"),
         Index("idx_order_date", "created_at"),
         {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
 
+class OrderLocator(Base):
+    """
+    Индекс заказов: id заказа -> created_at (ключ партиционирования "order").
+
+    Заполняется триггером на "order", позволяет находить заказ
+    в одной партиции без перебора индексов всех партиций. Id заказа
+    уникален: триггер отклоняет заказ с существующим id.
+    """
+
+    order_id = mapped_column(Integer, primary_key=True)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), comment="Дата создания заказа", nullable=False
+    )
+
+
 class OrderItem(Base):
     order_id = mapped_column(
         Integer, ForeignKey("order.id", ondelete="CASCADE"), primary_key=True
@@ -116,7 +199,8 @@ class OrderItem(Base):
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
-        comment="Дата создания записи",
+        comment="Дата создания заказа (ключ партиционирования)",
+        primary_key=True,
     )
     nomenclature = relationship("Nomenclature", back_populates="order_items")
     order = relationship("Order", back_populates="order_items")
@@ -126,4 +210,14 @@ class OrderItem(Base):
         CheckConstraint("price >= 0", name="chk_order_item_price_non_negative"),
         Index("idx_oi_order_created_at", "order_id", "created_at"),
         Index("idx_oi_nomenclature", "nomenclature_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class MatviewRefresh(Base):
+    """Время последнего обновления материализованного представления."""
+
+    name = mapped_column(Text, primary_key=True, comment="Имя представления")
+    refreshed_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), comment="Время последнего обновления", nullable=False
     )
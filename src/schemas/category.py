@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+
+
+class CategoryNodeOut(BaseModel):
+    id: int
+    name: str
+    level: int
+    parent_id: int | None
+    top_level_id: int
+    ancestor_ids: list[int]
+    children_count: int
+
+
+class CategoryChildrenCountOut(BaseModel):
+    id: int
+    name: str
+    direct_children_count: int
+
+
+class CategorySubtreeOut(BaseModel):
+    id: int
+    root_id: int
+    in_subtree: bool
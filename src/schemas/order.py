@@ -1,7 +1,9 @@
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
+from enum import Enum
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Order(BaseModel):
@@ -9,8 +11,7 @@ class Order(BaseModel):
     nomenclature_id: int
     amount: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CreateOrder(Order):
@@ -24,3 +25,108 @@ class UpdateOrder(Order):
 
 class OrderOut(Order):
     pass
+
+
+@dataclass(slots=True)
+class OrderItemRow:
+    """
+    Позиция заказа для быстрого пути add_product.
+
+    Заполняется из строки RETURNING и сериализуется orjson.dumps напрямую,
+    без модели pydantic и валидации ответа. Поля совпадают с OrderOut.
+    """
+
+    order_id: int
+    nomenclature_id: int
+    amount: int
+
+    @classmethod
+    def from_row(cls, row) -> "OrderItemRow":
+        return cls(row.order_id, row.nomenclature_id, row.amount)
+
+
+class OrderLine(BaseModel):
+    nomenclature_id: int
+    amount: int = Field(gt=0)
+
+
+class UpdateOrderBatch(BaseModel):
+    """
+    Добавление нескольких товаров в заказ.
+
+    all_or_nothing=True: если хотя бы одну позицию добавить нельзя,
+    не добавляется ни одна. all_or_nothing=False: добавляются все
+    позиции, для которых хватает товара.
+    """
+
+    order_id: int
+    items: list[OrderLine] = Field(min_length=1)
+    all_or_nothing: bool = True
+
+
+class OrderLineStatus(str, Enum):
+    ADDED = "added"
+    NOT_FOUND = "not_found"
+    NOT_IN_STOCK = "not_in_stock"
+    ROLLED_BACK = "rolled_back"
+
+
+class OrderLineOut(OrderLine):
+    status: OrderLineStatus
+    order_item: OrderOut | None = None
+
+
+class OrderBatchOut(BaseModel):
+    order_id: int
+    all_or_nothing: bool
+    committed: bool
+    items: list[OrderLineOut]
+
+
+class OrderImportOut(BaseModel):
+    rows: int = 0
+    orders: int = 0
+    order_items: int = 0
+    rejected_rows: int = 0
+    rejected_orders: list[int] = []
+    partitions: list[str] = []
+
+
+class OrderSummaryOut(BaseModel):
+    id: int
+    customer_id: int | None
+    created_at: datetime
+    total_sum: Decimal
+    item_count: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderPageOut(BaseModel):
+    items: list[OrderSummaryOut]
+    next_cursor: str | None = None
+
+
+class OrderItemOut(BaseModel):
+    nomenclature_id: int
+    amount: int
+    price: Decimal
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderItemPageOut(BaseModel):
+    order_id: int
+    created_at: datetime
+    items: list[OrderItemOut]
+    next_after: int | None = None
+
+
+class OrderPageQuery(BaseModel):
+    limit: int = Field(default=100, ge=1, le=1000)
+    cursor: str | None = None
+
+
+class OrderItemPageQuery(BaseModel):
+    limit: int = Field(default=100, ge=1, le=1000)
+    after: int | None = None
@@ -0,0 +1,24 @@
+from decimal import Decimal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class CatalogProduct(BaseModel):
+    """Редко меняющиеся атрибуты товара. Остаток в кэш не попадает."""
+
+    id: int
+    name: str
+    price: Decimal
+    category_ids: tuple[int, ...] = ()
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class StockBucketsIn(BaseModel):
+    buckets: int = Field(ge=0, le=1024)
+
+
+class ProductStockOut(BaseModel):
+    nomenclature_id: int
+    stock_buckets: int
+    amount: int
@@ -0,0 +1,48 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class CustomerTotalOut(BaseModel):
+    customer_id: int
+    name: str
+    total_sum: Decimal
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CustomerTotalsQuery(BaseModel):
+    limit: int = Field(default=100, ge=1, le=1000)
+    offset: int = Field(default=0, ge=0)
+
+
+class CustomerTotalsRebuildOut(BaseModel):
+    customers: int
+
+
+class TopSellerOut(BaseModel):
+    nomenclature_id: int
+    name: str
+    category_name: str | None
+    total_amount: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TopSellersOut(BaseModel):
+    refreshed_at: datetime | None
+    items: list[TopSellerOut]
+
+
+class AnalyticsQuery(BaseModel):
+    date_from: date | None = None
+    date_to: date | None = None
+    limit: int = Field(default=5, ge=1, le=1000)
+
+
+class MonthRevenueOut(BaseModel):
+    month: date
+    revenue: Decimal
+    orders: int
+    items: int
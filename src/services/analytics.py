@@ -0,0 +1,191 @@
+import asyncio
+import heapq
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from operator import itemgetter
+from typing import Any, Awaitable, Callable, TypeVar
+
+from src.core.config import settings
+from src.crud.analytics import AnalyticsCRUD
+from src.db.partition import month_start, next_month, partition_manager
+from src.models.models import Order
+from src.schemas.report import CustomerTotalOut, MonthRevenueOut, TopSellerOut
+
+T = TypeVar("T")
+Totals = list[tuple[int, Any]]
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class AnalyticsExecutor:
+    """
+    Параллельное выполнение отчётов по месячным партициям.
+
+    Отчёт разбивается на запросы по одному месяцу (по партициям "order",
+    известным PartitionManager), запросы выполняются одновременно на разных
+    соединениях пула (не больше concurrency сразу), частичные агрегаты
+    объединяются в Python. Время отчёта зависит от числа соединений,
+    а не от длины истории.
+    """
+
+    def __init__(self, concurrency: int) -> None:
+        self.concurrency = concurrency
+
+    async def months(
+        self,
+        date_from: date | None,
+        date_to: date | None,
+        today: date | None = None,
+    ) -> list[date]:
+        """
+        Месяцы партиций, пересекающиеся с [date_from, min(date_to, today)].
+
+        Партиции будущих месяцев, созданные заранее, не запрашиваются.
+        Запросы граничных месяцев ограничиваются датами отчёта (fan_out).
+        """
+        table = Order.__tablename__
+        if not partition_manager.known[table]:
+            await partition_manager.load()
+        last = month_start(min(date_to or date.max, today or utc_today()))
+        return sorted(
+            month
+            for month in partition_manager.known[table]
+            if (date_from is None or next_month(month) > date_from) and month <= last
+        )
+
+    async def fan_out(
+        self,
+        months: list[date],
+        query: Callable[[AnalyticsCRUD, date, date], Awaitable[T]],
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[T]:
+        """
+        query(crud, start, end) по каждому месяцу, [start, end) — пересечение
+        месяца с [date_from, date_to] (date_to включительно).
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        end_limit = date_to + timedelta(days=1) if date_to else None
+
+        async def run(month: date) -> T:
+            start = max(month, date_from) if date_from else month
+            end = next_month(month)
+            if end_limit:
+                end = min(end, end_limit)
+            async with semaphore:
+                async with AnalyticsCRUD() as crud:
+                    return await query(crud, start, end)
+
+        return await asyncio.gather(*(run(month) for month in months))
+
+    async def top_totals(
+        self,
+        months: list[date],
+        limit: int,
+        query: Callable[..., Awaitable[Totals]],
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> Totals:
+        """
+        limit ключей с наибольшей суммой по всем месяцам.
+
+        query(crud, start, end, limit=None, ids=None) возвращает (ключ, сумма)
+        за месяц: с limit — limit наибольших по убыванию, с ids — только
+        эти ключи. Каждый месяц отдаёт k наибольших (сначала k = limit),
+        кандидаты дочитываются точно в месяцах, вернувших ровно k строк.
+        Ключ вне кандидатов набирает не больше суммы k-х значений этих
+        месяцев; если limit-й результат не меньше её, ответ точный,
+        иначе k увеличивается.
+        """
+        k = limit
+        while True:
+            parts = await self.fan_out(
+                months,
+                lambda crud, start, end: query(crud, start, end, limit=k),
+                date_from,
+                date_to,
+            )
+            candidates = sorted({key for rows in parts for key, _ in rows})
+            partial = [month for month, rows in zip(months, parts) if len(rows) == k]
+            threshold = sum(rows[-1][1] for rows in parts if len(rows) == k)
+            exact = await self.fan_out(
+                partial,
+                lambda crud, start, end: query(crud, start, end, ids=candidates),
+                date_from,
+                date_to,
+            )
+            totals: dict[int, Any] = defaultdict(int)
+            for rows in [rows for rows in parts if len(rows) < k] + exact:
+                for key, total in rows:
+                    totals[key] += total
+            top = heapq.nlargest(limit, totals.items(), key=itemgetter(1))
+            if not partial or (len(top) == limit and top[-1][1] >= threshold):
+                return top
+            k *= 4
+
+    async def customer_totals(
+        self, date_from: date | None, date_to: date | None, limit: int
+    ) -> list[CustomerTotalOut]:
+        top = await self.top_totals(
+            await self.months(date_from, date_to),
+            limit,
+            lambda crud, start, end, limit=None, ids=None: crud.customer_sums(
+                start, end, limit, ids
+            ),
+            date_from,
+            date_to,
+        )
+        async with AnalyticsCRUD() as crud:
+            names = await crud.customer_names([customer_id for customer_id, _ in top])
+        return [
+            CustomerTotalOut(
+                customer_id=customer_id, name=names[customer_id], total_sum=total_sum
+            )
+            for customer_id, total_sum in top
+            if customer_id in names
+        ]
+
+    async def top_sellers(
+        self, date_from: date | None, date_to: date | None, limit: int
+    ) -> list[TopSellerOut]:
+        top = await self.top_totals(
+            await self.months(date_from, date_to),
+            limit,
+            lambda crud, start, end, limit=None, ids=None: crud.product_amounts(
+                start, end, limit, ids
+            ),
+            date_from,
+            date_to,
+        )
+        async with AnalyticsCRUD() as crud:
+            products = await crud.product_names([product_id for product_id, _ in top])
+        return [
+            TopSellerOut(
+                nomenclature_id=nomenclature_id,
+                name=products[nomenclature_id].name,
+                category_name=products[nomenclature_id].category,
+                total_amount=total_amount,
+            )
+            for nomenclature_id, total_amount in top
+            if nomenclature_id in products
+        ]
+
+    async def revenue_by_month(
+        self, date_from: date | None, date_to: date | None
+    ) -> list[MonthRevenueOut]:
+        months = await self.months(date_from, date_to)
+        parts = await self.fan_out(
+            months,
+            lambda crud, start, end: crud.revenue(start, end),
+            date_from,
+            date_to,
+        )
+        return [
+            MonthRevenueOut(month=month, revenue=revenue, orders=orders, items=items)
+            for month, (revenue, orders, items) in zip(months, parts)
+        ]
+
+
+analytics_executor = AnalyticsExecutor(concurrency=settings.analytics_concurrency)
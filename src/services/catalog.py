@@ -0,0 +1,124 @@
+import asyncpg
+from loguru import logger
+
+from src.core.config import settings
+from src.crud.product import ProductCRUD
+from src.db.db import listen
+from src.schemas.product import CatalogProduct
+from src.tools.cache import TTLCache
+from src.tools.exceptions import NotInStockExceptionError, ProductNotFoundExceptionError
+
+
+class ProductCatalog:
+    """
+    Read-through кэш каталога товаров перед ProductCRUD.
+
+    Хранит только название, цену и категории; остаток всегда читается из БД.
+    Записи сбрасываются по NOTIFY product_changed (ProductChangeListener)
+    при изменении названия, цены или категорий товара любым процессом.
+    Если уведомление потеряно (например, при разрыве соединения слушателя),
+    запись может устареть не дольше чем на ttl секунд.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.cache = TTLCache("product_catalog", maxsize=maxsize, ttl=ttl)
+
+    async def get(
+        self, crud: ProductCRUD, nomenclature_id: int
+    ) -> CatalogProduct | None:
+        product = self.cache.get(nomenclature_id)
+        if product is None:
+            row = await crud.get_catalog_product(nomenclature_id)
+            if not row:
+                return None
+            product = CatalogProduct.model_validate(row)
+            self.cache.set(nomenclature_id, product)
+        return product
+
+    def invalidate(self, nomenclature_id: int) -> None:
+        self.cache.invalidate(nomenclature_id)
+
+
+class NegativeProductCache:
+    """
+    Короткоживущий кэш отказов: несуществующие товары и товары без остатка.
+
+    Позволяет отклонять повторные запросы без обращения к БД. Для товара
+    без остатка хранится последний известный остаток: запрос отклоняется,
+    только если просят больше. Записи сбрасываются при добавлении товара
+    и пополнении остатка (NOTIFY product_changed, ProductChangeListener)
+    и по истечении времени жизни.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.unknown = TTLCache("unknown_products", maxsize=maxsize, ttl=ttl)
+        self.out_of_stock = TTLCache("out_of_stock_products", maxsize=maxsize, ttl=ttl)
+
+    def check(
+        self, nomenclature_id: int, amount: int
+    ) -> None | NotInStockExceptionError | ProductNotFoundExceptionError:
+        if self.unknown.get(nomenclature_id):
+            raise ProductNotFoundExceptionError
+        available = self.out_of_stock.get(nomenclature_id)
+        if available is not None and amount > available:
+            raise NotInStockExceptionError
+
+    def mark_unknown(self, nomenclature_id: int) -> None:
+        self.unknown.set(nomenclature_id, True)
+
+    def mark_out_of_stock(self, nomenclature_id: int, available: int) -> None:
+        self.out_of_stock.set(nomenclature_id, available)
+
+    def invalidate(self, nomenclature_id: int) -> None:
+        self.unknown.invalidate(nomenclature_id)
+        self.out_of_stock.invalidate(nomenclature_id)
+
+
+PRODUCT_CHANNEL = "product_changed"
+
+
+class ProductChangeListener:
+    """
+    Сброс записей кэшей товара по NOTIFY product_changed.
+
+    Триггеры на nomenclature, nomenclaturestock и productcategory отправляют
+    id товара при изменении атрибутов каталога, добавлении товара и
+    пополнении остатка; процесс слушает канал на отдельном соединении
+    вне пула.
+    """
+
+    def __init__(
+        self, catalog: ProductCatalog, negative_cache: NegativeProductCache
+    ) -> None:
+        self.catalog = catalog
+        self.negative_cache = negative_cache
+        self.notifications = 0
+        self._connection: asyncpg.Connection | None = None
+
+    def _notify(self, connection, pid, channel, payload) -> None:
+        self.notifications += 1
+        nomenclature_id = int(payload)
+        self.catalog.invalidate(nomenclature_id)
+        self.negative_cache.invalidate(nomenclature_id)
+
+    async def start(self) -> None:
+        try:
+            self._connection = await listen(PRODUCT_CHANNEL, self._notify)
+        except Exception as err:
+            logger.error(f"Не удалось подписаться на {PRODUCT_CHANNEL}: {err}")
+
+    async def stop(self) -> None:
+        if self._connection:
+            await self._connection.close()
+            self._connection = None
+
+
+product_catalog = ProductCatalog(
+    maxsize=settings.product_cache_size, ttl=settings.product_cache_ttl
+)
+negative_product_cache = NegativeProductCache(
+    maxsize=settings.negative_cache_size, ttl=settings.negative_cache_ttl
+)
+product_change_listener = ProductChangeListener(
+    product_catalog, negative_product_cache
+)
@@ -0,0 +1,130 @@
+import asyncio
+
+import asyncpg
+from loguru import logger
+
+from src.core.config import settings
+from src.crud.category import CategoryCRUD
+from src.db.db import listen
+from src.schemas.category import (
+    CategoryChildrenCountOut,
+    CategoryNodeOut,
+    CategorySubtreeOut,
+)
+from src.tools.category_tree import CategoryTree
+from src.tools.exceptions import ObjectNotFoundExceptionError
+
+CATEGORY_CHANNEL = "category_changed"
+
+
+class CategoryTreeService:
+    """
+    Дерево категорий в памяти процесса.
+
+    Загружается при запуске приложения и перестраивается целиком после
+    изменения category: триггер отправляет NOTIFY category_changed,
+    процесс слушает канал на отдельном соединении вне пула. На случай потери
+    уведомлений дерево также перечитывается раз в interval секунд.
+    Новое дерево подменяет старое одной операцией присваивания.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.tree = CategoryTree()
+        self.reloads = 0
+        self._changed = asyncio.Event()
+        self._connection: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+
+    async def load(self) -> None:
+        async with CategoryCRUD() as crud:
+            rows = await crud.get_paths()
+        self.tree = CategoryTree((row[0], row[1], row[2]) for row in rows)
+        self.reloads += 1
+        logger.info(f"Загружено дерево категорий: {len(self.tree)}")
+
+    def _notify(self, connection, pid, channel, payload) -> None:
+        self._changed.set()
+
+    async def _listen(self) -> None:
+        self._connection = await listen(CATEGORY_CHANNEL, self._notify)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            try:
+                await self.load()
+            except Exception as err:
+                logger.error(f"Не удалось загрузить дерево категорий: {err}")
+
+    async def start(self) -> None:
+        await self.load()
+        try:
+            await self._listen()
+        except Exception as err:
+            logger.error(f"Не удалось подписаться на {CATEGORY_CHANNEL}: {err}")
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection:
+            await self._connection.close()
+            self._connection = None
+
+    def _check(self, *category_ids: int) -> CategoryTree:
+        tree = self.tree
+        for category_id in category_ids:
+            if category_id not in tree:
+                raise ObjectNotFoundExceptionError("Категория не найдена")
+        return tree
+
+    def get_node(
+        self, category_id: int
+    ) -> CategoryNodeOut | ObjectNotFoundExceptionError:
+        tree = self._check(category_id)
+        return CategoryNodeOut(
+            id=category_id,
+            name=tree.name(category_id),
+            level=tree.level(category_id),
+            parent_id=tree.parent_id(category_id),
+            top_level_id=tree.top_level(category_id),
+            ancestor_ids=tree.ancestors(category_id),
+            children_count=tree.children_count(category_id),
+        )
+
+    def get_children_counts(self) -> list[CategoryChildrenCountOut]:
+        """Число прямых потомков каждой категории (запрос из README)."""
+        tree = self.tree
+        return [
+            CategoryChildrenCountOut(
+                id=category_id,
+                name=tree.name(category_id),
+                direct_children_count=tree.children_count(category_id),
+            )
+            for category_id in sorted(tree.ids)
+        ]
+
+    def check_subtree(
+        self, category_id: int, root_id: int
+    ) -> CategorySubtreeOut | ObjectNotFoundExceptionError:
+        tree = self._check(category_id, root_id)
+        return CategorySubtreeOut(
+            id=category_id,
+            root_id=root_id,
+            in_subtree=tree.in_subtree(category_id, root_id),
+        )
+
+
+category_tree_service = CategoryTreeService(
+    interval=settings.category_tree_reload_interval
+)
@@ -1,9 +1,23 @@
-from src.crud.order import OrderCRUD, OrderItemCRUD
+from src.core.config import settings
+from src.crud.base import CoreUnitOfWork, UnitOfWork
+from src.crud.order import OrderItemCRUD
 from src.crud.product import ProductCRUD
-from src.models.models import Nomenclature, OrderItem
-from src.schemas.order import CreateOrder, OrderOut, UpdateOrder
+from src.schemas.order import (
+    OrderBatchOut,
+    OrderItemRow,
+    OrderLine,
+    OrderLineOut,
+    OrderLineStatus,
+    OrderOut,
+)
+from src.services.catalog import negative_product_cache
 from src.services.product import ProductService
-from src.tools.exceptions import NotInStockExceptionError, ProductNotFoundExceptionError
+from src.services.reservation_batcher import reservation_batcher
+from src.tools.exceptions import (
+    NotInStockExceptionError,
+    OrderNotFoundExceptionError,
+    ProductNotFoundExceptionError,
+)
 
 
 class OrderService:
@@ -17,60 +31,188 @@ class OrderService:
         self.order_id = order_id
         self.amount = amount
 
-    async def get_orderitem_to_update(
+    async def update_orderitem(
         self,
-        order_item_crud: OrderItemCRUD,
-        order_crud: OrderCRUD,
-        product: Nomenclature,
-    ) -> OrderItem:
-        order_item = await order_item_crud.get_by(
-            order_id=self.order_id, nomenclature_id=self.nomenclature_id
-        )
-        order = await order_crud.get_by(id=self.order_id)
-        return (
-            await order_item_crud.create(
-                CreateOrder(
-                    amount=self.amount,
+    ) -> (
+        OrderOut
+        | NotInStockExceptionError
+        | ProductNotFoundExceptionError
+        | OrderNotFoundExceptionError
+    ):
+        """
+        Обновление количества товара в заказе:
+
+        1. Списание остатка товара, если его достаточно
+        2. Создание позиции заказа или увеличение количества в ней (upsert)
+
+        Все шаги выполняются в одной транзакции (UnitOfWork). При включённом
+        reservation_batching_enabled одновременные запросы к одному товару
+        объединяются в одну транзакцию (ReservationBatcher).
+        """
+        if settings.reservation_batching_enabled:
+            negative_product_cache.check(self.nomenclature_id, self.amount)
+            order_item = await reservation_batcher.submit(
+                order_id=self.order_id,
+                nomenclature_id=self.nomenclature_id,
+                amount=self.amount,
+            )
+            return OrderOut.model_validate(order_item)
+        async with UnitOfWork() as uow:
+            product = await ProductService(
+                self.nomenclature_id, session=uow.session
+            ).reserve(self.amount)
+            order_item = await uow.crud(OrderItemCRUD).upsert(
+                order_id=self.order_id,
+                nomenclature_id=self.nomenclature_id,
+                amount=self.amount,
+                price=product.price,
+            )
+            if not order_item:
+                raise OrderNotFoundExceptionError
+            return OrderOut.model_validate(order_item)
+
+    async def add_orderitem_core(
+        self,
+    ) -> (
+        OrderItemRow
+        | NotInStockExceptionError
+        | ProductNotFoundExceptionError
+        | OrderNotFoundExceptionError
+    ):
+        """
+        То же, что update_orderitem, без ORM-сессии (add_product_fast_path).
+
+        Запросы выполняются в соединении CoreUnitOfWork, строка RETURNING
+        сразу переносится в OrderItemRow.
+        """
+        if settings.reservation_batching_enabled:
+            negative_product_cache.check(self.nomenclature_id, self.amount)
+            return OrderItemRow.from_row(
+                await reservation_batcher.submit(
                     order_id=self.order_id,
                     nomenclature_id=self.nomenclature_id,
-                    price=product.price,
-                    created_at=order.created_at,
+                    amount=self.amount,
                 )
             )
-            if not order_item
-            else order_item
-        )
+        async with CoreUnitOfWork() as uow:
+            product = await ProductService(
+                self.nomenclature_id, session=uow.connection
+            ).reserve(self.amount)
+            order_item = await uow.crud(OrderItemCRUD).upsert(
+                order_id=self.order_id,
+                nomenclature_id=self.nomenclature_id,
+                amount=self.amount,
+                price=product.price,
+            )
+            if not order_item:
+                raise OrderNotFoundExceptionError
+            return OrderItemRow.from_row(order_item)
 
-    async def update_orderitem(
+
+class OrderBatchService:
+    def __init__(
         self,
-    ) -> OrderOut | NotInStockExceptionError | ProductNotFoundExceptionError:
+        order_id: int,
+        items: list[OrderLine],
+        all_or_nothing: bool = True,
+    ):
+        self.order_id = order_id
+        self.all_or_nothing = all_or_nothing
+        self.amounts: dict[int, int] = {}
+        for item in items:
+            self.amounts[item.nomenclature_id] = (
+                self.amounts.get(item.nomenclature_id, 0) + item.amount
+            )
+
+    async def update_orderitems(self) -> OrderBatchOut | OrderNotFoundExceptionError:
         """
-        Обновление количества товара в заказе:
+        Добавление нескольких товаров в заказ в одной транзакции:
 
-        1. Проверка наличия товара
-        2. Получение объекта заказ-товар из БД или создание нового
-        3. Обновление количества товара в объекте заказ-товар
-        4. Обновление количества товара в БД
+        1. Блокировка строк товаров без корзин остатка в порядке id
+        2. Проверка наличия каждого товара (товары с корзинами остатка
+           не блокируются и списываются сразу через reserve_sharded)
+        3. Списание остатков и upsert позиций заказа двумя запросами
 
+        Повторяющиеся товары суммируются. При all_or_nothing и хотя бы одной
+        недоступной позиции ничего не списывается (committed=False).
         """
-        product = await ProductService(self.nomenclature_id).check_amount(self.amount)
-        async with (
-            OrderItemCRUD() as order_item_crud,
-            OrderCRUD() as order_crud,
-            ProductCRUD() as product_crud,
-        ):
-            db_order_item = await self.get_orderitem_to_update(
-                order_item_crud=order_item_crud, order_crud=order_crud, product=product
-            )
-            new_order_item = UpdateOrder(
-                order_id=db_order_item.order_id,
-                nomenclature_id=db_order_item.nomenclature_id,
-                amount=self.amount + db_order_item.amount,
-            )
-            created_order_item = await order_item_crud.update(
-                db_order_item, new_order_item
+        async with UnitOfWork() as uow:
+            product_crud = uow.crud(ProductCRUD)
+            products = {
+                product.id: product
+                for product in await product_crud.lock_many(sorted(self.amounts))
+            }
+            locked = set(products)
+            unlocked = sorted(set(self.amounts) - locked)
+            if unlocked:
+                products.update(
+                    (product.id, product)
+                    for product in await product_crud.get_many(unlocked)
+                )
+            statuses = {}
+            accepted = {}
+            sharded = set()
+            for nomenclature_id, amount in sorted(self.amounts.items()):
+                product = products.get(nomenclature_id)
+                available = product.amount if product else None
+                if product and nomenclature_id not in locked:
+                    available = await product_crud.reserve_sharded(
+                        nomenclature_id, amount
+                    )
+                    sharded.add(nomenclature_id)
+                if not product:
+                    negative_product_cache.mark_unknown(nomenclature_id)
+                    statuses[nomenclature_id] = OrderLineStatus.NOT_FOUND
+                elif nomenclature_id in sharded and available is None:
+                    accepted[nomenclature_id] = amount
+                elif available < amount:
+                    negative_product_cache.mark_out_of_stock(nomenclature_id, available)
+                    statuses[nomenclature_id] = OrderLineStatus.NOT_IN_STOCK
+                else:
+                    accepted[nomenclature_id] = amount
+            committed = bool(accepted) and not (
+                self.all_or_nothing and len(accepted) < len(self.amounts)
             )
-            await product_crud.update(
-                product.id, {"amount": product.amount - self.amount}
+            order_items = {}
+            if not committed and sharded:
+                await uow.rollback()
+            if committed:
+                await product_crud.decrement_many(
+                    {
+                        nomenclature_id: amount
+                        for nomenclature_id, amount in accepted.items()
+                        if nomenclature_id not in sharded
+                    }
+                )
+                rows = await uow.crud(OrderItemCRUD).upsert_many(
+                    self.order_id,
+                    [
+                        (nomenclature_id, amount, products[nomenclature_id].price)
+                        for nomenclature_id, amount in accepted.items()
+                    ],
+                )
+                if not rows:
+                    raise OrderNotFoundExceptionError
+                order_items = {row.nomenclature_id: row for row in rows}
+            for nomenclature_id in accepted:
+                statuses[nomenclature_id] = (
+                    OrderLineStatus.ADDED if committed else OrderLineStatus.ROLLED_BACK
+                )
+            return OrderBatchOut(
+                order_id=self.order_id,
+                all_or_nothing=self.all_or_nothing,
+                committed=committed,
+                items=[
+                    OrderLineOut(
+                        nomenclature_id=nomenclature_id,
+                        amount=amount,
+                        status=statuses[nomenclature_id],
+                        order_item=(
+                            OrderOut.model_validate(order_items[nomenclature_id])
+                            if nomenclature_id in order_items
+                            else None
+                        ),
+                    )
+                    for nomenclature_id, amount in sorted(self.amounts.items())
+                ],
             )
-            return OrderOut.model_validate(created_order_item)
@@ -0,0 +1,174 @@
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import AsyncIterator
+
+import orjson
+
+from src.core.config import settings
+from src.crud.order import OrderImportCRUD
+from src.db.db import engine
+from src.db.partition import partition_manager
+from src.schemas.order import OrderImportOut
+from src.tools.exceptions import BadRequestExceptionError
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Разбиение потока байтов на строки без чтения всего потока в память."""
+    tail = b""
+    async for chunk in chunks:
+        tail += chunk
+        *lines, tail = tail.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if tail:
+        yield tail.decode("utf-8")
+
+
+async def _ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[tuple[dict, int]]:
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line), line_number
+        except orjson.JSONDecodeError as err:
+            raise BadRequestExceptionError(f"Строка {line_number}: {err}")
+
+
+async def _csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[tuple[dict, int]]:
+    """
+    Записи CSV с заголовком, разобранные csv.reader.
+
+    Запись в кавычках может занимать несколько строк: строки накапливаются,
+    пока число кавычек не станет чётным (экранированная кавычка — две).
+    """
+    header = None
+    record: list[str] = []
+    quotes = 0
+    line_number = start = 0
+    async for line in lines:
+        line_number += 1
+        if not record:
+            if not line.strip():
+                continue
+            start = line_number
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        try:
+            values = next(csv.reader(io.StringIO("\n".join(record))))
+        except csv.Error as err:
+            raise BadRequestExceptionError(f"Строка {start}: {err}")
+        record = []
+        quotes = 0
+        if header is None:
+            header = values
+            continue
+        yield dict(zip(header, values)), start
+    if record:
+        raise BadRequestExceptionError(f"Строка {start}: незакрытая кавычка")
+
+
+def _optional(value, cast):
+    return None if value in (None, "") else cast(value)
+
+
+class OrderImportService:
+    """
+    Потоковая загрузка заказов и позиций заказов.
+
+    Каждая строка входных данных (NDJSON или CSV с заголовком) содержит поля
+    order_id, created_at, customer_id, nomenclature_id, amount, price;
+    поля позиции пустые для заказа без позиций. Данные обрабатываются
+    порциями по chunk_size строк, каждая порция в своей транзакции.
+    Остатки товаров (nomenclature.amount) не меняются. Заказ с id, уже
+    загруженным с другой created_at, или с разными created_at в одной
+    порции отклоняется и попадает в rejected_orders.
+
+    Вся загрузка идёт в одном соединении: в нём живёт временная таблица
+    import_orderitem, которая удаляется по завершении или при ошибке.
+    Недостающие партиции создаются между транзакциями порции, вне их.
+    """
+
+    def __init__(self, file_format: str, chunk_size: int | None = None):
+        if file_format not in IMPORT_FORMATS:
+            raise BadRequestExceptionError(
+                f"Неизвестный формат {file_format}, ожидается один из {IMPORT_FORMATS}"
+            )
+        self.file_format = file_format
+        self.chunk_size = chunk_size or settings.import_chunk_size
+
+    def _to_record(self, row: dict, line_number: int) -> tuple:
+        try:
+            return (
+                int(row["order_id"]),
+                datetime.fromisoformat(row["created_at"]),
+                _optional(row.get("customer_id"), int),
+                _optional(row.get("nomenclature_id"), int),
+                _optional(row.get("amount"), int),
+                _optional(row.get("price"), lambda price: Decimal(str(price))),
+            )
+        except (KeyError, TypeError, ValueError, InvalidOperation) as err:
+            raise BadRequestExceptionError(f"Строка {line_number}: {err!r}")
+
+    async def _records(self, lines: AsyncIterator[str]) -> AsyncIterator[tuple]:
+        if self.file_format == "csv":
+            rows = _csv_rows(lines)
+        else:
+            rows = _ndjson_rows(lines)
+        async for row, line_number in rows:
+            yield self._to_record(row, line_number)
+
+    async def _chunks(self, lines: AsyncIterator[str]) -> AsyncIterator[list[tuple]]:
+        chunk = []
+        async for record in self._records(lines):
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def run(self, lines: AsyncIterator[str]) -> OrderImportOut:
+        """
+        Порции фиксируются по отдельности: при ошибке в данных загруженные
+        ранее порции остаются, их итоги передаются в сообщении об ошибке.
+        """
+        result = OrderImportOut()
+        async with engine.connect() as conn:
+            crud = OrderImportCRUD(session=conn)
+            try:
+                async with conn.begin():
+                    await crud.create_staging()
+                async for chunk in self._chunks(lines):
+                    async with conn.begin():
+                        await crud.copy_to_staging(chunk)
+                        rejected, rejected_rows = await crud.reject_conflicts()
+                        months = await crud.staged_months()
+                    result.partitions += await partition_manager.ensure(months)
+                    async with conn.begin():
+                        result.orders += await crud.merge_orders()
+                        result.order_items += await crud.merge_order_items()
+                        await crud.clear_staging()
+                    result.rows += len(chunk)
+                    result.rejected_rows += rejected_rows
+                    result.rejected_orders += rejected
+            except BadRequestExceptionError as err:
+                committed = result.model_dump_json(
+                    include={"rows", "orders", "order_items", "rejected_rows"}
+                )
+                raise BadRequestExceptionError(
+                    f"{err}. Загружено до ошибки: {committed}"
+                )
+            finally:
+                if not conn.invalidated:
+                    await conn.rollback()
+                    async with conn.begin():
+                        await crud.drop_staging()
+        return result
@@ -0,0 +1,59 @@
+from typing import AsyncIterator
+
+from src.core.config import settings
+from src.crud.order import OrderCRUD, OrderItemCRUD
+from src.schemas.order import (
+    OrderItemOut,
+    OrderItemPageOut,
+    OrderPageOut,
+    OrderSummaryOut,
+)
+from src.tools.exceptions import OrderNotFoundExceptionError
+from src.tools.pagination import decode_cursor, encode_cursor
+
+
+class OrderListingService:
+    """Чтение заказов с keyset-пагинацией и потоковой выдачей NDJSON."""
+
+    async def get_customer_orders(
+        self, customer_id: int, limit: int, cursor: str | None = None
+    ) -> OrderPageOut:
+        before = decode_cursor(cursor) if cursor else None
+        async with OrderCRUD() as crud:
+            rows = await crud.get_customer_orders(customer_id, limit, before)
+        items = [OrderSummaryOut.model_validate(row) for row in rows]
+        return OrderPageOut(
+            items=items,
+            next_cursor=(
+                encode_cursor(items[-1].created_at, items[-1].id)
+                if len(items) == limit
+                else None
+            ),
+        )
+
+    async def stream_customer_orders(self, customer_id: int) -> AsyncIterator[bytes]:
+        """Заказы клиента построчно (NDJSON), память не зависит от их числа."""
+        async with OrderCRUD() as crud:
+            async for row in crud.stream_customer_orders(
+                customer_id, settings.stream_chunk_size
+            ):
+                yield OrderSummaryOut.model_validate(row).model_dump_json().encode()
+                yield b"\n"
+
+    async def get_order_items(
+        self, order_id: int, limit: int, after: int | None = None
+    ) -> OrderItemPageOut | OrderNotFoundExceptionError:
+        async with OrderCRUD() as crud:
+            created_at = await crud.locate(order_id)
+            if created_at is None:
+                raise OrderNotFoundExceptionError
+            rows = await OrderItemCRUD(session=crud.session).get_order_items(
+                order_id, created_at, limit, after
+            )
+        items = [OrderItemOut.model_validate(row) for row in rows]
+        return OrderItemPageOut(
+            order_id=order_id,
+            created_at=created_at,
+            items=items,
+            next_after=items[-1].nomenclature_id if len(items) == limit else None,
+        )
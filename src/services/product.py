@@ -1,23 +1,100 @@
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
 from src.crud.product import ProductCRUD
 from src.models.models import Nomenclature
+from src.schemas.product import CatalogProduct, ProductStockOut
+from src.services.catalog import negative_product_cache, product_catalog
 from src.tools.exceptions import NotInStockExceptionError, ProductNotFoundExceptionError
 
 
 class ProductService:
-    def __init__(self, nomenclature_id: int):
+    def __init__(
+        self,
+        nomenclature_id: int,
+        session: AsyncSession | AsyncConnection | None = None,
+    ):
         self.nomenclature_id = nomenclature_id
+        self.session = session
 
-    async def check_product(self) -> Nomenclature | ProductNotFoundExceptionError:
-        async with ProductCRUD() as crud:
-            product = await crud.get_by(id=self.nomenclature_id)
+    async def check_product(self) -> CatalogProduct | ProductNotFoundExceptionError:
+        """Товар из кэша каталога, при промахе — из БД."""
+        negative_product_cache.check(self.nomenclature_id, 0)
+        async with ProductCRUD(session=self.session) as crud:
+            product = await product_catalog.get(crud, self.nomenclature_id)
             if not product:
+                negative_product_cache.mark_unknown(self.nomenclature_id)
                 raise ProductNotFoundExceptionError
             return product
 
     async def check_amount(
         self, amount: int
-    ) -> Nomenclature | NotInStockExceptionError:
-        product = await self.check_product()
-        if product.amount < amount:
-            raise NotInStockExceptionError
+    ) -> int | NotInStockExceptionError | ProductNotFoundExceptionError:
+        """Общий остаток товара (с учётом корзин), если его хватает."""
+        async with ProductCRUD(session=self.session) as crud:
+            stock = await crud.get_stock(self.nomenclature_id)
+            if stock is None:
+                raise ProductNotFoundExceptionError
+            if stock < amount:
+                raise NotInStockExceptionError
+            return stock
+
+    async def update(self, obj_in: dict) -> Nomenclature:
+        """
+        Изменение товара со сбросом записей кэшей в этом процессе.
+
+        Другие процессы сбрасывают запись каталога по NOTIFY product_changed.
+        """
+        async with ProductCRUD(session=self.session) as crud:
+            product = await crud.update(self.nomenclature_id, obj_in)
+        if obj_in.keys() & {"name", "price"}:
+            product_catalog.invalidate(self.nomenclature_id)
+        if "amount" in obj_in:
+            negative_product_cache.invalidate(self.nomenclature_id)
         return product
+
+    async def reserve(
+        self, amount: int
+    ) -> Row | NotInStockExceptionError | ProductNotFoundExceptionError:
+        """
+        Списание остатка товара в заказ одним условным запросом.
+
+        Повторные отказы по тому же товару отклоняются по кэшу без запроса в БД.
+        """
+        negative_product_cache.check(self.nomenclature_id, amount)
+        async with ProductCRUD(session=self.session) as crud:
+            product = await crud.reserve(self.nomenclature_id, amount)
+            if not product:
+                negative_product_cache.mark_unknown(self.nomenclature_id)
+                raise ProductNotFoundExceptionError
+            if product.remaining is None:
+                available = (
+                    await crud.reserve_sharded(self.nomenclature_id, amount)
+                    if product.stock_buckets
+                    else product.available
+                )
+                if available is not None:
+                    negative_product_cache.mark_out_of_stock(
+                        self.nomenclature_id, available
+                    )
+                    raise NotInStockExceptionError
+            await crud.save()
+            return product
+
+    async def set_stock_buckets(
+        self, buckets: int
+    ) -> ProductStockOut | ProductNotFoundExceptionError:
+        """
+        Разбиение остатка товара на корзины (buckets > 0) или их слияние (0).
+
+        Корзины снимают конкуренцию за строку nomenclature у популярных товаров.
+        """
+        async with ProductCRUD(session=self.session) as crud:
+            total = await crud.redistribute_stock(self.nomenclature_id, buckets)
+            if total is None:
+                raise ProductNotFoundExceptionError
+            await crud.save()
+        negative_product_cache.invalidate(self.nomenclature_id)
+        return ProductStockOut(
+            nomenclature_id=self.nomenclature_id, stock_buckets=buckets, amount=total
+        )
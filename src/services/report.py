@@ -0,0 +1,46 @@
+from src.core.config import settings
+from src.crud.customer import CustomerTotalCRUD
+from src.schemas.report import CustomerTotalOut, CustomerTotalsRebuildOut
+from src.tools.exceptions import ObjectNotFoundExceptionError
+
+
+class CustomerTotalService:
+    """Отчёт «сумма заказанных товаров по клиентам» из таблицы CustomerTotal."""
+
+    async def get_total(
+        self, customer_id: int
+    ) -> CustomerTotalOut | ObjectNotFoundExceptionError:
+        async with CustomerTotalCRUD() as crud:
+            row = await crud.get_total(customer_id)
+            if not row:
+                raise ObjectNotFoundExceptionError("Клиент не найден")
+            return CustomerTotalOut.model_validate(row)
+
+    async def get_totals(self, limit: int, offset: int = 0) -> list[CustomerTotalOut]:
+        async with CustomerTotalCRUD() as crud:
+            return [
+                CustomerTotalOut.model_validate(row)
+                for row in await crud.get_totals(limit, offset)
+            ]
+
+    async def rebuild(self) -> CustomerTotalsRebuildOut:
+        """
+        Сверка: полный пересчёт сумм по позициям заказов.
+
+        Клиенты пересчитываются пакетами по customer_totals_rebuild_batch_size,
+        каждый пакет в своей транзакции: добавление позиций блокируется
+        только для клиентов текущего пакета и только на время его пересчёта.
+        """
+        customers = 0
+        after = 0
+        while True:
+            async with CustomerTotalCRUD() as crud:
+                customer_ids = await crud.rebuild_batch(
+                    after, settings.customer_totals_rebuild_batch_size
+                )
+                await crud.save()
+            if not customer_ids:
+                break
+            customers += len(customer_ids)
+            after = customer_ids[-1]
+        return CustomerTotalsRebuildOut(customers=customers)
@@ -0,0 +1,226 @@
+import asyncio
+from dataclasses import dataclass, field
+
+from loguru import logger
+from sqlalchemy import Row
+
+from src.core.config import settings
+from src.crud.base import UnitOfWork
+from src.crud.order import OrderCRUD, OrderItemCRUD
+from src.crud.product import ProductCRUD
+from src.services.catalog import negative_product_cache
+from src.tools.exceptions import (
+    NotInStockExceptionError,
+    OrderNotFoundExceptionError,
+    ProductNotFoundExceptionError,
+)
+
+
+@dataclass
+class _Reservation:
+    order_id: int
+    amount: int
+    future: asyncio.Future = field(repr=False)
+
+
+def allocate(
+    available: int, reservations: list[_Reservation], order_ids: set[int]
+) -> tuple[dict[int, int], dict[int, Exception], int]:
+    """
+    Выдача остатка запросам пакета в порядке поступления.
+
+    Запросы к заказам не из order_ids отклоняются с OrderNotFoundExceptionError
+    и остаток не расходуют. Возвращает (количество по order_id, исключения
+    по id(запроса), оставшийся остаток).
+    """
+    granted: dict[int, int] = {}
+    rejected: dict[int, Exception] = {}
+    for reservation in reservations:
+        if reservation.order_id not in order_ids:
+            rejected[id(reservation)] = OrderNotFoundExceptionError()
+        elif reservation.amount > available:
+            rejected[id(reservation)] = NotInStockExceptionError()
+        else:
+            available -= reservation.amount
+            granted[reservation.order_id] = (
+                granted.get(reservation.order_id, 0) + reservation.amount
+            )
+    return granted, rejected, available
+
+
+class ReservationBatcher:
+    """
+    Группировка одновременных добавлений одного товара в заказы.
+
+    Запросы к одному товару копятся window секунд (или до max_size штук),
+    затем выполняются одной транзакцией: блокировка строки товара, проверка
+    заказов одним запросом к OrderLocator, выдача остатка в порядке
+    поступления (allocate), один upsert позиций заказов, одно
+    списание остатка и один commit. Каждый запрос получает свою позицию
+    заказа или своё исключение.
+    """
+
+    def __init__(self, window: float, max_size: int) -> None:
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[int, list[_Reservation]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.requests = 0
+        self.max_batch_size = 0
+
+    async def submit(self, order_id: int, nomenclature_id: int, amount: int) -> Row:
+        reservation = _Reservation(
+            order_id=order_id,
+            amount=amount,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        batch = self._pending.setdefault(nomenclature_id, [])
+        batch.append(reservation)
+        if len(batch) == 1:
+            self._spawn(self._flush_later(nomenclature_id, batch))
+        elif len(batch) >= self.max_size:
+            self._pending.pop(nomenclature_id)
+            self._spawn(self._flush(nomenclature_id, batch))
+        return await reservation.future
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": (
+                round(self.requests / self.batches, 2) if self.batches else 0.0
+            ),
+            "max_batch_size": self.max_batch_size,
+            "pending": sum(len(batch) for batch in self._pending.values()),
+        }
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(
+        self, nomenclature_id: int, batch: list[_Reservation]
+    ) -> None:
+        await asyncio.sleep(self.window)
+        if self._pending.get(nomenclature_id) is batch:
+            self._pending.pop(nomenclature_id)
+            await self._flush(nomenclature_id, batch)
+
+    async def _flush(self, nomenclature_id: int, batch: list[_Reservation]) -> None:
+        self.batches += 1
+        self.requests += len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        results: dict[int, Row | Exception] = {}
+        try:
+            async with UnitOfWork() as uow:
+                results = await self._apply(uow, nomenclature_id, batch)
+        except Exception as err:
+            logger.error(err)
+            results = {id(reservation): err for reservation in batch}
+        finally:
+            # При отмене задачи результатов нет: ожидающие запросы отменяются,
+            # а не зависают.
+            for reservation in batch:
+                if reservation.future.done():
+                    continue
+                result = results.get(id(reservation))
+                if result is None:
+                    reservation.future.cancel()
+                elif isinstance(result, Exception):
+                    reservation.future.set_exception(result)
+                else:
+                    reservation.future.set_result(result)
+
+    async def _apply(
+        self, uow: UnitOfWork, nomenclature_id: int, batch: list[_Reservation]
+    ) -> dict[int, Row | Exception]:
+        product_crud = uow.crud(ProductCRUD)
+        order_item_crud = uow.crud(OrderItemCRUD)
+        products = await product_crud.lock_many([nomenclature_id])
+        if not products:
+            # Товар с корзинами остатка: строка товара не блокируется.
+            products = await product_crud.get_many([nomenclature_id])
+            if not products:
+                negative_product_cache.mark_unknown(nomenclature_id)
+                return {id(item): ProductNotFoundExceptionError() for item in batch}
+            return await self._apply_sharded(uow, products[0], batch)
+        product = products[0]
+
+        order_ids = await uow.crud(OrderCRUD).existing_ids(
+            {reservation.order_id for reservation in batch}
+        )
+        granted, rejected, available = allocate(product.amount, batch, order_ids)
+        results: dict[int, Row | Exception] = dict(rejected)
+        if any(
+            isinstance(error, NotInStockExceptionError) for error in rejected.values()
+        ):
+            negative_product_cache.mark_out_of_stock(nomenclature_id, available)
+        if not granted:
+            return results
+
+        rows = await order_item_crud.upsert_lines(
+            [
+                (order_id, nomenclature_id, amount, product.price)
+                for order_id, amount in granted.items()
+            ]
+        )
+        order_items = {row.order_id: row for row in rows}
+        await product_crud.decrement_many(
+            {
+                nomenclature_id: sum(
+                    amount
+                    for order_id, amount in granted.items()
+                    if order_id in order_items
+                )
+            }
+        )
+        for reservation in batch:
+            if id(reservation) in results:
+                continue
+            results[id(reservation)] = order_items.get(
+                reservation.order_id, OrderNotFoundExceptionError()
+            )
+        return results
+
+    async def _apply_sharded(
+        self, uow: UnitOfWork, product: Row, batch: list[_Reservation]
+    ) -> dict[int, Row | Exception]:
+        """
+        Товар с корзинами остатка: каждый запрос в своей точке сохранения.
+
+        Строка товара не заблокирована, списание идёт из корзин.
+        """
+        product_crud = uow.crud(ProductCRUD)
+        order_item_crud = uow.crud(OrderItemCRUD)
+        results: dict[int, Row | Exception] = {}
+        for reservation in batch:
+            savepoint = await uow.session.begin_nested()
+            available = await product_crud.reserve_sharded(
+                product.id, reservation.amount
+            )
+            if available is not None:
+                negative_product_cache.mark_out_of_stock(product.id, available)
+                results[id(reservation)] = NotInStockExceptionError()
+                await savepoint.rollback()
+                continue
+            order_item = await order_item_crud.upsert(
+                order_id=reservation.order_id,
+                nomenclature_id=product.id,
+                amount=reservation.amount,
+                price=product.price,
+            )
+            if not order_item:
+                results[id(reservation)] = OrderNotFoundExceptionError()
+                await savepoint.rollback()
+                continue
+            await savepoint.commit()
+            results[id(reservation)] = order_item
+        return results
+
+
+reservation_batcher = ReservationBatcher(
+    window=settings.reservation_batch_window_ms / 1000,
+    max_size=settings.reservation_batch_max_size,
+)
@@ -0,0 +1,93 @@
+import asyncio
+
+from loguru import logger
+
+from src.core.config import settings
+from src.crud.top_sellers import TopSellersCRUD
+from src.schemas.report import TopSellerOut, TopSellersOut
+from src.tools.exceptions import ClientConnectionError
+
+
+class TopSellersRefresher:
+    """
+    Фоновое обновление и раздача отчёта «Топ-5 товаров за прошлый месяц».
+
+    Раз в interval секунд каждый процесс приложения пытается взять
+    advisory-блокировку; обновляет представление (REFRESH ... CONCURRENTLY)
+    только получивший её процесс и только если с прошлого обновления прошло
+    больше половины interval. Затем каждый процесс перечитывает представление
+    в память: запросы получают снимок, отчёт в них не выполняется.
+    """
+
+    def __init__(self, interval: float, enabled: bool = True) -> None:
+        self.interval = interval
+        self.enabled = enabled
+        self.snapshot: TopSellersOut | None = None
+        self.refreshes = 0
+        self._task: asyncio.Task | None = None
+        self._load_lock = asyncio.Lock()
+
+    async def refresh(self) -> bool:
+        async with TopSellersCRUD() as crud:
+            refreshed = False
+            if await crud.try_lock() and await crud.is_stale(self.interval / 2):
+                await crud.refresh()
+                refreshed = True
+            await crud.save()
+        if refreshed:
+            self.refreshes += 1
+            logger.info(f"Обновлено представление {TopSellersCRUD.view_name}")
+        return refreshed
+
+    async def load(self) -> None:
+        async with TopSellersCRUD() as crud:
+            rows = await crud.get_rows()
+            refreshed_at = await crud.get_refreshed_at()
+        self.snapshot = TopSellersOut(
+            refreshed_at=refreshed_at,
+            items=[TopSellerOut.model_validate(row) for row in rows],
+        )
+
+    async def get(self) -> TopSellersOut | ClientConnectionError:
+        """
+        Снимок отчёта. До первой фоновой загрузки снимок читается из
+        представления сразу (один запрос на все ожидающие вызовы); если БД
+        недоступна — ClientConnectionError (503).
+        """
+        if self.snapshot is None:
+            async with self._load_lock:
+                if self.snapshot is None:
+                    try:
+                        await self.load()
+                    except Exception as err:
+                        logger.error(f"Не удалось загрузить отчёт топ-5 товаров: {err}")
+                        raise ClientConnectionError("Отчёт временно недоступен")
+        return self.snapshot
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if self.enabled:
+                    await self.refresh()
+                await self.load()
+            except Exception as err:
+                logger.error(f"Не удалось обновить отчёт топ-5 товаров: {err}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+top_sellers_refresher = TopSellersRefresher(
+    interval=settings.top_sellers_refresh_interval,
+    enabled=settings.top_sellers_refresh_enabled,
+)
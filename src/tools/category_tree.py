@@ -0,0 +1,125 @@
+from array import array
+from typing import Iterable, Iterator
+
+
+class CategoryTree:
+    """
+    Дерево категорий в плоских массивах.
+
+    Узлы нумеруются индексами 0..n-1 (в порядке (глубина пути, путь)),
+    для каждого узла хранятся: parent, depth, first_child / next_sibling,
+    число прямых потомков, корень (категория 1 уровня) и интервал
+    [tin, tout) обхода в глубину. Поддерево узла — отрезок order[tin:tout],
+    поэтому проверка вхождения в поддерево выполняется за O(1),
+    предки — за O(depth).
+
+    rows: (id, name, path), path — ltree строкой вида "1.5.7".
+    Категория, родительского пути которой нет, считается корнем.
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, str, str]] = ()) -> None:
+        rows = sorted(rows, key=lambda row: (row[2].count("."), row[2]))
+        size = len(rows)
+        self.ids = array("i", (row[0] for row in rows))
+        self.names = [row[1] for row in rows]
+        self.index = {category_id: i for i, category_id in enumerate(self.ids)}
+        self.parent = array("i", [-1]) * size
+        self.depth = array("i", [0]) * size
+        self.first_child = array("i", [-1]) * size
+        self.next_sibling = array("i", [-1]) * size
+        self.child_count = array("i", [0]) * size
+        self.top = array("i", [0]) * size
+        self.tin = array("i", [0]) * size
+        self.tout = array("i", [0]) * size
+        self.order = array("i")
+
+        by_path = {row[2]: i for i, row in enumerate(rows)}
+        # Обход с конца: потомки добавляются в начало списка,
+        # поэтому братья оказываются в порядке путей.
+        for i in reversed(range(size)):
+            head = rows[i][2].rpartition(".")[0]
+            parent = by_path.get(head, -1) if head else -1
+            self.parent[i] = parent
+            if parent >= 0:
+                self.next_sibling[i] = self.first_child[parent]
+                self.first_child[parent] = i
+                self.child_count[parent] += 1
+        # Родитель короче потомка, поэтому стоит раньше него.
+        for i in range(size):
+            parent = self.parent[i]
+            if parent >= 0:
+                self.depth[i] = self.depth[parent] + 1
+                self.top[i] = self.top[parent]
+            else:
+                self.top[i] = i
+        self._euler_tour()
+
+    def _euler_tour(self) -> None:
+        timer = 0
+        for root in range(len(self.ids)):
+            if self.parent[root] >= 0:
+                continue
+            node = root
+            while True:
+                self.tin[node] = timer
+                self.order.append(node)
+                timer += 1
+                if self.first_child[node] >= 0:
+                    node = self.first_child[node]
+                    continue
+                while node != root and self.next_sibling[node] < 0:
+                    self.tout[node] = timer
+                    node = self.parent[node]
+                self.tout[node] = timer
+                if node == root:
+                    break
+                node = self.next_sibling[node]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, category_id: int) -> bool:
+        return category_id in self.index
+
+    def name(self, category_id: int) -> str:
+        return self.names[self.index[category_id]]
+
+    def parent_id(self, category_id: int) -> int | None:
+        parent = self.parent[self.index[category_id]]
+        return self.ids[parent] if parent >= 0 else None
+
+    def level(self, category_id: int) -> int:
+        """Уровень вложенности, категории 1 уровня — 0."""
+        return self.depth[self.index[category_id]]
+
+    def children_count(self, category_id: int) -> int:
+        return self.child_count[self.index[category_id]]
+
+    def children(self, category_id: int) -> Iterator[int]:
+        child = self.first_child[self.index[category_id]]
+        while child >= 0:
+            yield self.ids[child]
+            child = self.next_sibling[child]
+
+    def ancestors(self, category_id: int) -> list[int]:
+        """Предки от категории 1 уровня до родителя."""
+        result = []
+        node = self.parent[self.index[category_id]]
+        while node >= 0:
+            result.append(self.ids[node])
+            node = self.parent[node]
+        result.reverse()
+        return result
+
+    def top_level(self, category_id: int) -> int:
+        return self.ids[self.top[self.index[category_id]]]
+
+    def in_subtree(self, category_id: int, root_id: int) -> bool:
+        """category_id совпадает с root_id или лежит в его поддереве."""
+        node = self.index[category_id]
+        root = self.index[root_id]
+        return self.tin[root] <= self.tin[node] < self.tout[root]
+
+    def subtree(self, category_id: int) -> list[int]:
+        node = self.index[category_id]
+        return [self.ids[i] for i in self.order[self.tin[node] : self.tout[node]]]
@@ -4,9 +4,11 @@ from fastapi import HTTPException, status
 from fastapi.routing import APIRoute
 
 from src.tools.exceptions import (
+    BadRequestExceptionError,
     ClientConnectionError,
     NotInStockExceptionError,
     ObjectNotFoundExceptionError,
+    OrderNotFoundExceptionError,
     ProductNotFoundExceptionError,
     UserNotFoundExceptionError,
 )
@@ -19,10 +21,14 @@ def handle_exceptions(route_func):
             return await route_func(*args, **kwargs)
         except TypeError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
+        except BadRequestExceptionError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except UserNotFoundExceptionError as e:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
         except ObjectNotFoundExceptionError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except OrderNotFoundExceptionError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except ProductNotFoundExceptionError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except NotInStockExceptionError as e:
@@ -35,6 +35,13 @@ class ProductNotFoundExceptionError(CustomExceptionError):
         super().__init__(message)
 
 
+class OrderNotFoundExceptionError(CustomExceptionError):
+    """Класс для исключений, если заказ не найден."""
+
+    def __init__(self, message="Заказ не найден"):
+        super().__init__(message)
+
+
 class NotInStockExceptionError(CustomExceptionError):
     """Класс для исключений, если товара недостаточно для заказа."""
 
@@ -0,0 +1,21 @@
+import base64
+from datetime import datetime
+
+import orjson
+
+from src.tools.exceptions import BadRequestExceptionError
+
+
+def encode_cursor(created_at: datetime, obj_id: int) -> str:
+    """Непрозрачный курсор keyset-пагинации по (created_at, id)."""
+    return base64.urlsafe_b64encode(
+        orjson.dumps([created_at.isoformat(), obj_id])
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, obj_id = orjson.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(created_at), int(obj_id)
+    except (ValueError, TypeError) as err:
+        raise BadRequestExceptionError(f"Неверный курсор: {err}")
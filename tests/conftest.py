@@ -0,0 +1,4 @@
+import os
+
+# Настройки приложения читаются при импорте модулей src.
+os.environ.setdefault("APP_PORT", "8001")
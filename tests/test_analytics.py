@@ -0,0 +1,77 @@
+import asyncio
+from datetime import date
+
+from src.services.analytics import AnalyticsExecutor
+
+
+async def bounds(crud, start: date, end: date) -> tuple[date, date]:
+    return start, end
+
+
+def fan_out(date_from, date_to, months=(date(2026, 9, 1), date(2026, 10, 1))):
+    return asyncio.run(
+        AnalyticsExecutor(concurrency=2).fan_out(months, bounds, date_from, date_to)
+    )
+
+
+def test_whole_months_without_dates():
+    assert fan_out(None, None) == [
+        (date(2026, 9, 1), date(2026, 10, 1)),
+        (date(2026, 10, 1), date(2026, 11, 1)),
+    ]
+
+
+def test_boundary_months_are_clamped():
+    assert fan_out(date(2026, 9, 15), date(2026, 10, 20)) == [
+        (date(2026, 9, 15), date(2026, 10, 1)),
+        (date(2026, 10, 1), date(2026, 10, 21)),
+    ]
+
+
+def test_range_inside_one_month():
+    assert fan_out(date(2026, 10, 15), date(2026, 10, 20), [date(2026, 10, 1)]) == [
+        (date(2026, 10, 15), date(2026, 10, 21))
+    ]
+
+
+SEP, OCT, NOV = date(2026, 9, 1), date(2026, 10, 1), date(2026, 11, 1)
+
+
+def test_future_partitions_are_skipped(monkeypatch):
+    from src.db.partition import partition_manager
+
+    monkeypatch.setitem(partition_manager.known, "order", {SEP, OCT, NOV})
+    months = AnalyticsExecutor(concurrency=2).months
+    assert asyncio.run(months(None, None, today=date(2026, 10, 18))) == [SEP, OCT]
+    assert asyncio.run(months(None, date(2026, 9, 30), today=date(2026, 10, 18))) == [
+        SEP
+    ]
+
+
+def top_totals(amounts: dict[date, dict[int, int]], limit: int) -> list:
+    queries = []
+
+    async def query(crud, start, end, limit=None, ids=None):
+        queries.append((start, limit, ids))
+        rows = sorted(amounts[start].items(), key=lambda row: (-row[1], row[0]))
+        if ids is not None:
+            rows = [row for row in rows if row[0] in ids]
+        return rows[:limit] if limit is not None else rows
+
+    executor = AnalyticsExecutor(concurrency=2)
+    top = asyncio.run(executor.top_totals(sorted(amounts), limit, query))
+    return top, queries
+
+
+def test_top_totals_reads_limit_per_month():
+    amounts = {SEP: {1: 10, 2: 9, 3: 1}, OCT: {1: 5, 2: 8, 4: 1}}
+    top, queries = top_totals(amounts, 2)
+    assert top == [(2, 17), (1, 15)]
+    assert all(limit == 2 for _, limit, ids in queries if ids is None)
+
+
+def test_top_totals_finds_key_outside_monthly_tops():
+    # Товар 3 не входит в топ-1 ни одного месяца, но первый по сумме.
+    amounts = {SEP: {1: 10, 3: 9}, OCT: {2: 10, 3: 9}}
+    top, _ = top_totals(amounts, 1)
+    assert top == [(3, 18)]
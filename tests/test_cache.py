@@ -0,0 +1,63 @@
+import pytest
+
+from src.tools import cache
+from src.tools.cache import TTLCache, cache_registry
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_set_and_stats(clock):
+    ttl_cache = TTLCache("test_get_set", maxsize=10, ttl=5)
+    assert ttl_cache.get("a") is None
+    ttl_cache.set("a", 1)
+    assert ttl_cache.get("a") == 1
+    stats = ttl_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+    assert cache_registry["test_get_set"] is ttl_cache
+
+
+def test_expiration(clock):
+    ttl_cache = TTLCache("test_expiration", maxsize=10, ttl=5)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2, ttl=60)
+    clock[0] += 5
+    assert ttl_cache.get("a", "default") == "default"
+    assert ttl_cache.get("b") == 2
+    assert ttl_cache.expirations == 1
+    assert len(ttl_cache) == 1
+
+
+def test_lru_eviction(clock):
+    ttl_cache = TTLCache("test_eviction", maxsize=2, ttl=5)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("c") == 3
+    assert ttl_cache.evictions == 1
+
+
+def test_falsy_values_are_cached(clock):
+    ttl_cache = TTLCache("test_falsy", maxsize=10, ttl=5)
+    ttl_cache.set("zero", 0)
+    assert ttl_cache.get("zero", "default") == 0
+
+
+def test_invalidate_and_clear(clock):
+    ttl_cache = TTLCache("test_invalidate", maxsize=10, ttl=5)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.invalidate("a")
+    ttl_cache.invalidate("missing")
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.invalidations == 1
+    ttl_cache.clear()
+    assert len(ttl_cache) == 0
+    assert ttl_cache.invalidations == 2
@@ -0,0 +1,74 @@
+import pytest
+
+from src.tools.category_tree import CategoryTree
+
+ROWS = [
+    (7, "Ноутбуки", "1.5.7"),
+    (1, "Электроника", "1"),
+    (5, "Компьютеры", "1.5"),
+    (2, "Одежда", "2"),
+    (8, "Мониторы", "1.5.8"),
+    (6, "Телефоны", "1.6"),
+    (9, "Сирота", "3.9"),
+]
+
+
+@pytest.fixture
+def tree() -> CategoryTree:
+    return CategoryTree(ROWS)
+
+
+def test_empty_tree():
+    tree = CategoryTree()
+    assert len(tree) == 0
+    assert 1 not in tree
+
+
+def test_parents_and_levels(tree):
+    assert len(tree) == len(ROWS)
+    assert tree.parent_id(1) is None
+    assert tree.parent_id(7) == 5
+    assert tree.level(1) == 0
+    assert tree.level(5) == 1
+    assert tree.level(7) == 2
+    assert tree.name(6) == "Телефоны"
+
+
+def test_missing_parent_path_is_root(tree):
+    assert tree.parent_id(9) is None
+    assert tree.level(9) == 0
+    assert tree.top_level(9) == 9
+
+
+def test_children_in_path_order(tree):
+    assert list(tree.children(1)) == [5, 6]
+    assert list(tree.children(5)) == [7, 8]
+    assert list(tree.children(7)) == []
+    assert tree.children_count(1) == 2
+    assert tree.children_count(2) == 0
+
+
+def test_ancestors_and_top_level(tree):
+    assert tree.ancestors(7) == [1, 5]
+    assert tree.ancestors(1) == []
+    assert tree.top_level(8) == 1
+    assert tree.top_level(2) == 2
+
+
+def test_subtree(tree):
+    assert tree.subtree(1) == [1, 5, 7, 8, 6]
+    assert tree.subtree(5) == [5, 7, 8]
+    assert tree.subtree(2) == [2]
+
+
+def test_in_subtree(tree):
+    assert tree.in_subtree(7, 1)
+    assert tree.in_subtree(5, 5)
+    assert not tree.in_subtree(6, 5)
+    assert not tree.in_subtree(1, 7)
+    assert not tree.in_subtree(9, 1)
+
+
+def test_unknown_category(tree):
+    with pytest.raises(KeyError):
+        tree.level(100)
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from src.services.order_import import OrderImportService, iter_lines
+from src.tools.exceptions import BadRequestExceptionError
+
+HEADER = b"order_id,created_at,customer_id,nomenclature_id,amount,price\n"
+
+
+async def stream(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def records(data: bytes, file_format: str = "csv") -> list[tuple]:
+    async def collect():
+        service = OrderImportService(file_format)
+        return [record async for record in service._records(iter_lines(stream(data)))]
+
+    return asyncio.run(collect())
+
+
+def test_csv_quoted_newline():
+    data = HEADER + b'1,2026-01-01T00:00:00+00:00,,"2\n",3,1.5\n2,2026-01-02,5,4,1,2\n'
+    assert [record[0] for record in records(data)] == [1, 2]
+    assert records(data)[0][3] == 2
+
+
+def test_csv_skips_blank_lines():
+    data = HEADER + b"\n1,2026-01-01,,2,3,1\n\n"
+    assert len(records(data)) == 1
+
+
+def test_csv_unclosed_quote():
+    with pytest.raises(BadRequestExceptionError, match="Строка 2"):
+        records(HEADER + b'1,"2026-01-01,,2,3,1\n')
+
+
+def test_ndjson_error_line_number():
+    data = b'{"order_id": 1, "created_at": "2026-01-01"}\n{bad\n'
+    with pytest.raises(BadRequestExceptionError, match="Строка 2"):
+        records(data, "ndjson")
@@ -0,0 +1,23 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.product import router
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("amount", [0, -1])
+def test_add_products_rejects_non_positive_amount(amount):
+    response = client.post(
+        "/orders/add_products",
+        json={"order_id": 1, "items": [{"nomenclature_id": 1, "amount": amount}]},
+    )
+    assert response.status_code == 422
+
+
+def test_add_products_rejects_empty_items():
+    response = client.post("/orders/add_products", json={"order_id": 1, "items": []})
+    assert response.status_code == 422
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.tools.exceptions import BadRequestExceptionError
+from src.tools.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    created_at = datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_round_trip_keeps_offset():
+    created_at = datetime(2026, 1, 1, tzinfo=timezone(timedelta(hours=3)))
+    decoded, _ = decode_cursor(encode_cursor(created_at, 1))
+    assert decoded.utcoffset() == timedelta(hours=3)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2026, 10, 18, tzinfo=timezone.utc), 10**9)
+    assert set(cursor) <= set(
+        "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_="
+    )
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "WzFd", "WyJ4IiwgMV0="])
+def test_invalid_cursor(cursor):
+    with pytest.raises(BadRequestExceptionError):
+        decode_cursor(cursor)
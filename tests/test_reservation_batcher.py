@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from src.services.reservation_batcher import _Reservation, allocate
+from src.tools.exceptions import NotInStockExceptionError, OrderNotFoundExceptionError
+
+
+def reservations(*items: tuple[int, int]) -> list[_Reservation]:
+    loop = asyncio.new_event_loop()
+    try:
+        return [
+            _Reservation(order_id=order_id, amount=amount, future=loop.create_future())
+            for order_id, amount in items
+        ]
+    finally:
+        loop.close()
+
+
+def test_grants_in_arrival_order():
+    batch = reservations((1, 3), (2, 5), (3, 2))
+    granted, rejected, available = allocate(8, batch, {1, 2, 3})
+    assert granted == {1: 3, 2: 5}
+    assert list(rejected) == [id(batch[2])]
+    assert isinstance(rejected[id(batch[2])], NotInStockExceptionError)
+    assert available == 0
+
+
+def test_smaller_request_after_rejection_is_granted():
+    batch = reservations((1, 10), (2, 1))
+    granted, rejected, available = allocate(5, batch, {1, 2})
+    assert granted == {2: 1}
+    assert list(rejected) == [id(batch[0])]
+    assert available == 4
+
+
+def test_missing_orders_do_not_consume_stock():
+    batch = reservations((404, 5), (1, 5))
+    granted, rejected, available = allocate(5, batch, {1})
+    assert granted == {1: 5}
+    assert isinstance(rejected[id(batch[0])], OrderNotFoundExceptionError)
+    assert available == 0
+
+
+def test_same_order_amounts_are_summed():
+    batch = reservations((1, 2), (1, 3))
+    granted, rejected, available = allocate(10, batch, {1})
+    assert granted == {1: 5}
+    assert rejected == {}
+    assert available == 5
+
+
+@pytest.mark.parametrize("order_ids", [set(), {2}])
+def test_nothing_granted(order_ids):
+    batch = reservations((1, 1))
+    granted, rejected, available = allocate(10, batch, order_ids)
+    assert granted == {}
+    assert available == 10
+    assert isinstance(rejected[id(batch[0])], OrderNotFoundExceptionError)
@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from src.schemas.report import TopSellersOut
+from src.services.top_sellers import TopSellersRefresher
+from src.tools.exceptions import ClientConnectionError
+
+
+class Refresher(TopSellersRefresher):
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__(interval=60)
+        self.fail = fail
+        self.loads = 0
+
+    async def load(self) -> None:
+        self.loads += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise OSError("connection refused")
+        self.snapshot = TopSellersOut(
+            refreshed_at=datetime(2026, 10, 1, tzinfo=timezone.utc), items=[]
+        )
+
+
+def test_first_get_loads_once():
+    refresher = Refresher()
+
+    async def run():
+        return await asyncio.gather(*(refresher.get() for _ in range(5)))
+
+    snapshots = asyncio.run(run())
+    assert refresher.loads == 1
+    assert all(snapshot is refresher.snapshot for snapshot in snapshots)
+
+
+def test_unavailable_before_first_load():
+    with pytest.raises(ClientConnectionError):
+        asyncio.run(Refresher(fail=True).get())